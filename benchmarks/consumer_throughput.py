@@ -0,0 +1,124 @@
+"""
+Compares the throughput of the per-message consumer path with the micro-batching one.
+
+Both modes store real orders in the database from settings, the exchange rate is fixed so the external API does
+not skew the numbers. The database has to be migrated and contain the order types.
+
+Usage:
+    python benchmarks/consumer_throughput.py --messages 5000 --batch-size 100 --timeout-ms 50
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from sqlalchemy import delete, insert
+
+from src.consumer import PARALLEL_TASKS
+from src.database.database import get_session
+from src.database.models import Order, UserSession
+from src.pika.batcher import MessageBatcher
+from src.pika.router import message_router
+
+USD_RATE = 90.0
+
+
+class FakeMessage:
+    """The part of aio_pika.IncomingMessage used by the consumer."""
+
+    def __init__(self, payload: dict) -> None:
+        self.body = json.dumps(payload).encode()
+        self.content_type = 'application/json'
+
+    @asynccontextmanager
+    async def process(self):
+        yield
+
+    async def ack(self) -> None:
+        pass
+
+    async def nack(self, requeue: bool = True) -> None:
+        pass
+
+    async def reject(self, requeue: bool = False) -> None:
+        pass
+
+
+def make_messages(count: int, session_id: str) -> list[FakeMessage]:
+    return [
+        FakeMessage({
+            'name': f'bench {i}',
+            'weight': '1.25',
+            'cost': '10.50',
+            'order_type_name': 'Clothing',
+            'background_task_id': str(uuid.uuid4()),
+            'session_uuid': session_id,
+        })
+        for i in range(count)
+    ]
+
+
+async def run_per_message(messages: list[FakeMessage]) -> None:
+    semaphore = asyncio.Semaphore(PARALLEL_TASKS)
+
+    async def handle(message: FakeMessage) -> None:
+        async with semaphore:
+            await message_router(message)
+
+    await asyncio.gather(*(handle(message) for message in messages))
+
+
+async def run_batched(messages: list[FakeMessage], batch_size: int, timeout_ms: int) -> None:
+    batcher = MessageBatcher(batch_size, timeout_ms)
+    for message in messages:
+        await batcher(message)
+    await batcher.close()
+
+
+async def main(count: int, batch_size: int, timeout_ms: int) -> None:
+    session_id = f'bench-{uuid.uuid4()}'
+    async with get_session() as session:
+        await session.execute(insert(UserSession).values(session_id=session_id))
+        await session.commit()
+
+    async def get_price_usd() -> float:
+        return USD_RATE
+
+    modes = {
+        'per-message': lambda messages: run_per_message(messages),
+        f'batched (size={batch_size}, timeout={timeout_ms}ms)': lambda messages: run_batched(
+            messages, batch_size, timeout_ms
+        ),
+    }
+
+    try:
+        with patch('src.pricing.delivery.get_price_usd', get_price_usd):
+            for name, run in modes.items():
+                messages = make_messages(count, session_id)
+                started = time.perf_counter()
+                await run(messages)
+                elapsed = time.perf_counter() - started
+                print(f'{name:<40} {count} orders in {elapsed:.2f}s, {count / elapsed:.0f} orders/s')
+    finally:
+        async with get_session() as session:
+            await session.execute(delete(Order).where(Order.session_uuid == session_id))
+            await session.execute(delete(UserSession).where(UserSession.session_id == session_id))
+            await session.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--timeout-ms', type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.messages, args.batch_size, args.timeout_ms))
@@ -0,0 +1,62 @@
+"""
+Measures the latency of order registration through RabbitMQ for new, cookieless visitors.
+
+Every request is sent without a session cookie, which is the path that used to insert a user_sessions row
+before publishing. Run it against a build before and after a change and compare the percentiles.
+
+Usage:
+    python benchmarks/create_order_latency.py --url http://localhost:9999/api/v1/create_order_rabbit/ \
+        --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ORDER = {'name': 'bench', 'weight': '1.25', 'cost': '10.50', 'order_type_name': 'Clothing'}
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def main(url: str, count: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def send() -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                # Built without the client, so cookies set by earlier responses are not sent
+                response = await client.send(httpx.Request('POST', url, json=ORDER))
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(count)))
+        elapsed = time.perf_counter() - started
+
+    print(f'{count} requests, concurrency {concurrency}, {errors} errors, {count / elapsed:.0f} req/s')
+    print(
+        f'p50 {percentile(latencies, 0.50) * 1000:.1f} ms, '
+        f'p90 {percentile(latencies, 0.90) * 1000:.1f} ms, '
+        f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms, '
+        f'mean {statistics.mean(latencies) * 1000:.1f} ms'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:9999/api/v1/create_order_rabbit/')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.requests, args.concurrency))
@@ -0,0 +1,115 @@
+"""
+Compares the CPU time and memory of building one order list response from ORM objects and from projected rows.
+
+The ORM path loads Order objects and lets FastAPI validate and serialize them through response_model=OrderSchemas,
+as GET /order/get_user_orders_list did before. The projected path selects ORDER_COLUMNS into rows and renders them
+with dump_order_row and ORJSONResponse. Both read the same page of orders from the database in settings; the page is
+created before and deleted after the run. The database has to be migrated.
+
+Usage:
+    python benchmarks/order_list_response.py --page-size 100 --requests 500
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import delete, insert
+
+from src.database.models import Order, UserSession
+from src.database.transaction import session_scope
+from src.models.order.repository import OrderRepository
+from src.models.order.schemas import ORDER_COLUMNS, OrderSchemas, dump_order_row
+
+RESPONSE_FIELD = create_response_field(name='Response', type_=list[OrderSchemas], mode='serialization')
+
+
+async def orm_response(session_id: str, page_size: int) -> bytes:
+    repo = OrderRepository()
+    page = await repo.get_orders_for_user(None, None, session_id, 1, page_size)
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=page.items)
+    return JSONResponse(content).body
+
+
+async def projected_response(session_id: str, page_size: int) -> bytes:
+    repo = OrderRepository()
+    page = await repo.get_orders_for_user(None, None, session_id, 1, page_size, columns=ORDER_COLUMNS)
+    return ORJSONResponse([dump_order_row(row) for row in page.items]).body
+
+
+async def measure(build, session_id: str, page_size: int, count: int) -> tuple[list[float], list[int]]:
+    cpu_times, peaks = [], []
+
+    # A session per request, as in the API
+    for _ in range(count):
+        async with session_scope():
+            started = time.process_time()
+            await build(session_id, page_size)
+            cpu_times.append(time.process_time() - started)
+
+    # Separate pass, tracing allocations slows everything down
+    for _ in range(max(1, count // 10)):
+        async with session_scope():
+            tracemalloc.start()
+            await build(session_id, page_size)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    return cpu_times, peaks
+
+
+async def main(page_size: int, count: int) -> None:
+    session_id = f'bench-{uuid.uuid4()}'
+    async with session_scope() as session:
+        await session.execute(insert(UserSession).values(session_id=session_id))
+        await session.execute(insert(Order), [
+            {
+                'name': f'bench {i}',
+                'weight': Decimal('1.250'),
+                'cost': Decimal('10.50'),
+                'delivery_cost': Decimal('112.38') if i % 2 else None,
+                'order_type_name': 'Clothing',
+                'session_uuid': session_id,
+            }
+            for i in range(page_size)
+        ])
+        await session.commit()
+
+    try:
+        async with session_scope():
+            orm_body = await orm_response(session_id, page_size)
+            projected_body = await projected_response(session_id, page_size)
+        assert orm_body == projected_body, 'both paths have to render the same JSON'
+
+        for name, build in (('ORM + response_model', orm_response), ('projected + ORJSONResponse', projected_response)):
+            cpu_times, peaks = await measure(build, session_id, page_size, count)
+            print(
+                f'{name:<28} CPU per request: median {statistics.median(cpu_times) * 1000:.2f} ms, '
+                f'p90 {sorted(cpu_times)[int(len(cpu_times) * 0.9)] * 1000:.2f} ms; '
+                f'peak memory {statistics.median(peaks) / 1024:.0f} KiB'
+            )
+    finally:
+        async with session_scope() as session:
+            await session.execute(delete(Order).where(Order.session_uuid == session_id))
+            await session.execute(delete(UserSession).where(UserSession.session_id == session_id))
+            await session.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.page_size, args.requests))
@@ -0,0 +1,77 @@
+"""
+Compares publishes per second and publish latency of RabbitConnect in 'transaction' and 'confirm' mode.
+
+Concurrent tasks publish the order message of POST /create_order_rabbit/ the way the endpoint does, to a temporary
+queue that is deleted afterwards, so the consumer does not see them. RabbitMQ of the settings has to be running.
+
+To compare the endpoint itself, start the API once with RMQ_PUBLISH_MODE=transaction and once with
+RMQ_PUBLISH_MODE=confirm and run benchmarks/create_order_latency.py against each.
+
+Usage:
+    python benchmarks/rabbit_publish_modes.py --messages 20000 --concurrency 100 --pool-size 4
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from src.pika.config.rabbit_connection import RabbitConnect
+
+ORDER = {
+    'name': 'bench', 'weight': '1.25', 'cost': '10.50', 'order_type_name': 'Clothing',
+    'background_task_id': '', 'session_uuid': 'bench',
+}
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def measure(publisher: RabbitConnect, queue: str, count: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def publish() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await publisher.send_message({**ORDER, 'background_task_id': str(uuid.uuid4())}, routing_key=queue)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(publish() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f'{publisher.mode:<12} {count / elapsed:>8.0f} publishes/s, '
+        f'p50 {percentile(latencies, 0.50) * 1000:.2f} ms, '
+        f'p99 {percentile(latencies, 0.99) * 1000:.2f} ms'
+    )
+
+
+async def main(count: int, concurrency: int, pool_size: int, max_outstanding: int) -> None:
+    for mode in ('transaction', 'confirm'):
+        publisher = RabbitConnect(mode=mode, pool_size=pool_size, max_outstanding_confirms=max_outstanding)
+        await publisher.connect()
+        queue = await publisher.channels[0].declare_queue(f'bench-{uuid.uuid4()}', exclusive=True)
+        try:
+            await measure(publisher, queue.name, count, concurrency)
+        finally:
+            await queue.delete(if_unused=False, if_empty=False)
+            await publisher.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--max-outstanding', type=int, default=256)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.messages, args.concurrency, args.pool_size, args.max_outstanding))
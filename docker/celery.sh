@@ -3,4 +3,4 @@
 cd src
 
 
-celery --app=celery_app:app_celery worker -l INFO
+celery --app=celery_app:app_celery worker -B -l INFO
@@ -0,0 +1,46 @@
+"""Order keyset pagination
+
+Revision ID: 5d2a7c1e9b43
+Revises: 473140cf27fb
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a7c1e9b43'
+down_revision: Union[str, None] = '473140cf27fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SORT_INDEXES = {
+    'ix_orders_session_uuid_id': ['session_uuid', 'id'],
+    'ix_orders_session_uuid_cost_id': ['session_uuid', 'cost', 'id'],
+    'ix_orders_session_uuid_delivery_cost_id': ['session_uuid', 'delivery_cost', 'id'],
+    'ix_orders_session_uuid_created_at_id': ['session_uuid', 'created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    # now() is not volatile, so existing rows get the default without a table rewrite
+    op.add_column(
+        'orders',
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+    )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns in SORT_INDEXES.items():
+            op.create_index(name, 'orders', columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in SORT_INDEXES:
+            op.drop_index(name, table_name='orders', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('orders', 'created_at')
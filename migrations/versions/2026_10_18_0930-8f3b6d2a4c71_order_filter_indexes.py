@@ -0,0 +1,50 @@
+"""Order filter indexes
+
+Revision ID: 8f3b6d2a4c71
+Revises: 5d2a7c1e9b43
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b6d2a4c71'
+down_revision: Union[str, None] = '5d2a7c1e9b43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_session_uuid_order_type_name_id', 'orders', ['session_uuid', 'order_type_name', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_orders_session_uuid_id_not_calculated', 'orders', ['session_uuid', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+            postgresql_where=sa.text("delivery_cost = 'Не рассчитана'")
+        )
+        # Duplicates the primary key index
+        op.drop_index('ix_orders_id', table_name='orders', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_id', 'orders', ['id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'ix_orders_session_uuid_id_not_calculated', table_name='orders',
+            postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index(
+            'ix_orders_session_uuid_order_type_name_id', table_name='orders',
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,99 @@
+"""Delivery cost numeric
+
+Revision ID: b71e04c9a2d5
+Revises: 8f3b6d2a4c71
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e04c9a2d5'
+down_revision: Union[str, None] = '8f3b6d2a4c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOT_CALCULATED = 'Не рассчитана'
+
+BATCH_SIZE = 10000
+
+# Indexes built on delivery_cost_numeric and the names they take over from the indexes on the old column
+RENAMED_INDEXES = (
+    ('ix_orders_session_uuid_delivery_cost_numeric', 'ix_orders_session_uuid_delivery_cost_id'),
+    ('ix_orders_session_uuid_numeric_not_calculated', 'ix_orders_session_uuid_id_not_calculated'),
+)
+
+# Walks the table in primary key order, so every batch seeks to where the previous one stopped instead of scanning
+# past the rows already backfilled. Returns the last id of the batch, NULL once the table is done.
+BACKFILL = sa.text(
+    """
+    WITH batch AS (
+        SELECT id FROM orders WHERE id > :last_id ORDER BY id LIMIT :batch_size
+    ), updated AS (
+        UPDATE orders SET delivery_cost_numeric = orders.delivery_cost::numeric(12, 2)
+        FROM batch
+        WHERE orders.id = batch.id AND orders.delivery_cost IS NOT NULL AND orders.delivery_cost <> :not_calculated
+    )
+    SELECT max(id) FROM batch
+    """
+)
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('delivery_cost_numeric', sa.Numeric(precision=12, scale=2), nullable=True))
+
+    # Every batch is committed on its own, so the table is never locked for the whole backfill
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        last_id = ''
+        while last_id is not None:
+            last_id = connection.execute(
+                BACKFILL, {'last_id': last_id, 'not_calculated': NOT_CALCULATED, 'batch_size': BATCH_SIZE}
+            ).scalar()
+
+    # Rows priced by the old code while the backfill was running
+    op.execute(
+        sa.text(
+            "UPDATE orders SET delivery_cost_numeric = delivery_cost::numeric(12, 2) "
+            "WHERE delivery_cost_numeric IS NULL AND delivery_cost IS NOT NULL AND delivery_cost <> :not_calculated"
+        ).bindparams(not_calculated=NOT_CALCULATED)
+    )
+
+    # The indexes on the new column are built before the old ones are dropped and follow the column rename, so the
+    # list queries filtered by delivery cost are never left without an index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_session_uuid_delivery_cost_numeric', 'orders', ['session_uuid', 'delivery_cost_numeric', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_orders_session_uuid_numeric_not_calculated', 'orders', ['session_uuid', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+            postgresql_where=sa.text("delivery_cost_numeric IS NULL")
+        )
+
+    op.drop_index('ix_orders_session_uuid_id_not_calculated', table_name='orders')
+    op.drop_index('ix_orders_session_uuid_delivery_cost_id', table_name='orders')
+    op.drop_column('orders', 'delivery_cost')
+    op.alter_column('orders', 'delivery_cost_numeric', new_column_name='delivery_cost')
+    for temporary_name, name in RENAMED_INDEXES:
+        op.execute(f'ALTER INDEX {temporary_name} RENAME TO {name}')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_session_uuid_id_not_calculated', table_name='orders')
+    op.drop_index('ix_orders_session_uuid_delivery_cost_id', table_name='orders')
+    op.alter_column(
+        'orders', 'delivery_cost',
+        type_=sa.String(),
+        postgresql_using=f"coalesce(delivery_cost::text, '{NOT_CALCULATED}')"
+    )
+    op.create_index('ix_orders_session_uuid_delivery_cost_id', 'orders', ['session_uuid', 'delivery_cost', 'id'])
+    op.create_index(
+        'ix_orders_session_uuid_id_not_calculated', 'orders', ['session_uuid', 'id'],
+        postgresql_where=sa.text(f"delivery_cost = '{NOT_CALCULATED}'")
+    )
@@ -0,0 +1,33 @@
+"""Drop order type foreign key
+
+Revision ID: 110d91ce620d
+Revises: b71e04c9a2d5
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '110d91ce620d'
+down_revision: Union[str, None] = 'b71e04c9a2d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Name given by PostgreSQL to the unnamed constraint of the create_table revision
+CONSTRAINT = 'orders_order_type_name_fkey'
+
+
+def upgrade() -> None:
+    # Order types are validated by the application against its in-process registry
+    op.drop_constraint(CONSTRAINT, 'orders', type_='foreignkey')
+
+
+def downgrade() -> None:
+    # NOT VALID skips the scan of existing rows under an exclusive lock, VALIDATE checks them afterwards
+    op.create_foreign_key(
+        CONSTRAINT, 'orders', 'order_types', ['order_type_name'], ['name'], postgresql_not_valid=True
+    )
+    op.execute(f'ALTER TABLE orders VALIDATE CONSTRAINT {CONSTRAINT}')
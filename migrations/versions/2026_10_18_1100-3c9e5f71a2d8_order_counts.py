@@ -0,0 +1,42 @@
+"""Order counts
+
+Revision ID: 3c9e5f71a2d8
+Revises: 110d91ce620d
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.counters import CREATE_ORDER_COUNTS_TRIGGERS, DROP_ORDER_COUNTS_TRIGGERS, FILL_ORDER_COUNTS
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e5f71a2d8'
+down_revision: Union[str, None] = '110d91ce620d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'order_counts',
+        sa.Column('session_uuid', sa.String(), nullable=False),
+        sa.Column('order_type_name', sa.String(), nullable=False),
+        sa.Column('calculated', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('session_uuid', 'order_type_name', 'calculated')
+    )
+    # Writes to orders wait until the existing orders are counted and the triggers are in place
+    op.execute('LOCK TABLE orders IN SHARE MODE')
+    op.execute(FILL_ORDER_COUNTS)
+    for statement in CREATE_ORDER_COUNTS_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DROP_ORDER_COUNTS_TRIGGERS:
+        op.execute(statement)
+    op.drop_table('order_counts')
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.types import Backend
+from loguru import logger
+from redis.asyncio.client import Redis
+
+from src.cache.invalidation import INVALIDATION_CHANNEL
+from src.cache.keys import CACHE_PREFIX, key_builder
+from src.config import settings
+from src.metrics import metrics
+
+# Seconds between attempts to subscribe to the invalidation channel again after an error
+RESUBSCRIBE_DELAY = 1.0
+
+
+class InstrumentedBackend(Backend):
+    """
+    fastapi_cache backend that counts hits, misses and stores and times every call, per cached route.
+
+    The route is taken from the key built by key_builder, metrics are named like cache.order.get_order_by_id.hit.
+
+    Usage:
+        init_cache(RedisBackend(redis))
+    """
+
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+
+    @staticmethod
+    def _route(key: str) -> str:
+        # <prefix>:<namespace>:<route>:<digest>
+        parts = key.rsplit(':', 2)
+        return parts[1] if len(parts) == 3 else 'unknown'
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        route = self._route(key)
+        started = time.perf_counter()
+        ttl, value = await self.backend.get_with_ttl(key)
+        metrics.observe(f'cache.{route}.get', time.perf_counter() - started)
+        metrics.inc(f'cache.{route}.{"miss" if value is None else "hit"}')
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.backend.get(key)
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        route = self._route(key)
+        started = time.perf_counter()
+        await self.backend.set(key, value, expire)
+        metrics.observe(f'cache.{route}.set', time.perf_counter() - started)
+        metrics.inc(f'cache.{route}.store')
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await self.backend.clear(namespace, key)
+
+
+class TwoTierBackend(Backend):
+    """
+    fastapi_cache backend with a process-local LRU in front of Redis.
+
+    Values read from or written to Redis are also kept in process memory, for at most local_ttl seconds and
+    never longer than in Redis. The memory tier is bounded by the total size of keys and values, least recently
+    used entries are evicted first. Keys published on the invalidation channel are dropped from the memory of
+    every process; if the subscription breaks, the memory tier is emptied, since invalidations may have been missed.
+
+    Usage:
+        backend = TwoTierBackend(redis, max_bytes=32 * 1024 * 1024, local_ttl=30)
+        await backend.start()
+        ...
+        await backend.close()
+    """
+
+    def __init__(self, redis: Redis, max_bytes: int, local_ttl: float) -> None:
+        self.redis = redis
+        self.remote = RedisBackend(redis)
+        self._max_bytes = max_bytes
+        self._local_ttl = local_ttl
+        # key -> (local expiry, Redis expiry or None, value), in the order of use
+        self._local: OrderedDict[str, tuple[float, float | None, bytes]] = OrderedDict()
+        self._size = 0
+        self._listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Subscribes to the invalidation channel."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        """Unsubscribes from the invalidation channel."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        now = time.monotonic()
+        if (entry := self._local.get(key)) is not None:
+            expires_at, remote_expires_at, value = entry
+            if now < expires_at:
+                self._local.move_to_end(key)
+                metrics.inc('cache.local.hit')
+                return (-1 if remote_expires_at is None else int(remote_expires_at - now)), value
+            self._drop(key)
+
+        metrics.inc('cache.local.miss')
+        ttl, value = await self.remote.get_with_ttl(key)
+        if value is not None:
+            self._store(key, value, ttl if ttl > 0 else None)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await self.remote.set(key, value, expire)
+        self._store(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        removed = await self.remote.clear(namespace, key)
+        pattern = f"{namespace}:*" if namespace else key
+        if pattern:
+            await self.redis.publish(INVALIDATION_CHANNEL, json.dumps([pattern]))
+            self.invalidate([pattern])
+        return removed
+
+    def invalidate(self, keys: list[str]) -> None:
+        """
+        Drops keys from the memory tier of this process, a key ending with * drops all keys starting with it.
+        """
+        for key in keys:
+            if key.endswith('*'):
+                for cached_key in [cached_key for cached_key in self._local if cached_key.startswith(key[:-1])]:
+                    self._drop(cached_key)
+            else:
+                self._drop(key)
+
+    def _store(self, key: str, value: bytes, expire: int | None) -> None:
+        size = len(key) + len(value)
+        if size > self._max_bytes:
+            return
+
+        now = time.monotonic()
+        remote_expires_at = now + expire if expire else None
+        self._drop(key)
+        self._local[key] = (min(now + self._local_ttl, remote_expires_at or float('inf')), remote_expires_at, value)
+        self._size += size
+
+        while self._size > self._max_bytes:
+            self._drop(next(iter(self._local)))
+            metrics.inc('cache.local.evict')
+
+    def _drop(self, key: str) -> None:
+        if (entry := self._local.pop(key, None)) is not None:
+            self._size -= len(key) + len(entry[2])
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.invalidate(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation channel failed, emptying the local cache: {e}")
+                self._local.clear()
+                self._size = 0
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+
+def init_cache(backend: Backend) -> None:
+    """
+    Initializes fastapi_cache of the process with the project key builder and metrics.
+
+    Args:
+        backend (Backend): Storage of the cached responses.
+    """
+    FastAPICache.init(InstrumentedBackend(backend), prefix=CACHE_PREFIX, key_builder=key_builder)
+
+
+async def start_cache(redis: Redis) -> Backend:
+    """
+    Initializes fastapi_cache with Redis, behind a process-local tier if CACHE_LOCAL_ENABLED is set.
+
+    Args:
+        redis (Redis): Client of the Redis storing the cache.
+
+    Returns:
+        Backend: The backend, to be passed to stop_cache on shutdown.
+    """
+    backend: Backend = RedisBackend(redis)
+    if settings.CACHE_LOCAL_ENABLED:
+        backend = TwoTierBackend(redis, settings.CACHE_LOCAL_MAX_BYTES, settings.CACHE_LOCAL_TTL)
+        await backend.start()
+    init_cache(backend)
+    return backend
+
+
+async def stop_cache(backend: Backend) -> None:
+    """Stops the invalidation listener of a backend created by start_cache."""
+    if isinstance(backend, TwoTierBackend):
+        await backend.close()
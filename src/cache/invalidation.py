@@ -0,0 +1,38 @@
+import json
+from typing import Iterable
+
+from loguru import logger
+
+from src.cache.keys import order_cache_key
+from src.metrics import metrics
+from src.redis_client import redis_client
+
+# Carries the JSON list of invalidated keys to every process that keeps cached responses of its own
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+
+async def invalidate_orders(lookup_ids: Iterable[str | None]) -> None:
+    """
+    Drops the cached GET /order/{order_id} responses of changed orders and announces it to all processes.
+
+    An order can be requested by its id and by its background task id, both have to be passed.
+    Called after the change is committed, otherwise a concurrent request could cache the old version again.
+    Errors are logged and not raised, the change itself is already stored.
+
+    Args:
+        lookup_ids (Iterable[str | None]): Identifiers and background task ids of the changed orders.
+    """
+
+    keys = [order_cache_key(lookup_id) for lookup_id in lookup_ids if lookup_id]
+    if not keys:
+        return
+
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+            await pipe.execute()
+        metrics.inc('cache.order.invalidate', len(keys))
+    except Exception as e:
+        metrics.inc('cache.order.invalidate_error')
+        logger.error(f"Error in invalidating {len(keys)} cached orders: {e}")
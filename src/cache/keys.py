@@ -0,0 +1,100 @@
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Prefix of all cache keys of the project
+CACHE_PREFIX = 'fastapi-cache'
+
+# Namespace and route of the cached GET /order/{order_id} responses
+ORDER_NAMESPACE = 'order'
+ORDER_ROUTE = 'order.get_order_by_id'
+
+# Marks arguments that do not change the response: services, requests, responses, sessions
+_SKIP = object()
+
+
+def _semantic_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Enum):
+        return _semantic_value(value.value)
+    if isinstance(value, (Decimal, UUID, date, datetime)):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json')
+    if isinstance(value, (list, tuple, set, frozenset)):
+        values = [_semantic_value(item) for item in value]
+        return _SKIP if _SKIP in values else values
+    if isinstance(value, dict):
+        values = {str(key): _semantic_value(item) for key, item in value.items()}
+        return _SKIP if _SKIP in values.values() else values
+    return _SKIP
+
+
+def route_name(func: Callable[..., Any]) -> str:
+    """Returns the name of a cached route like order.get_order_by_id, from its module and function."""
+    return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+
+def build_cache_key(namespace: str, route: str, params: dict[str, Any]) -> str:
+    """
+    Builds the cache key of a route called with the given semantic parameters.
+
+    Args:
+        namespace (str): Cache prefix and namespace, joined with a colon.
+        route (str): Name of the route, see route_name.
+        params (dict[str, Any]): JSON-compatible parameters of the call.
+
+    Returns:
+        str: Key like fastapi-cache:order:order.get_order_by_id:<md5 of the parameters>.
+    """
+    digest = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"{namespace}:{route}:{digest}"
+
+
+def key_builder(
+        func: Callable[..., Any],
+        namespace: str = '',
+        *,
+        request: Optional[Request] = None,
+        response: Optional[Response] = None,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+) -> str:
+    """
+    Key builder of all cached routes.
+
+    Only parameters that change the response are part of the key: path, query and body values, enums and
+    pydantic models. Injected services, requests and responses are left out, so identical requests share
+    one entry regardless of the objects created for them.
+
+    Returns:
+        str: Cache key of the call.
+    """
+    params = {
+        name: value
+        for name, value in (
+            *((str(index), _semantic_value(arg)) for index, arg in enumerate(args)),
+            *((name, _semantic_value(arg)) for name, arg in kwargs.items()),
+        )
+        if value is not _SKIP
+    }
+    return build_cache_key(namespace, route_name(func), params)
+
+
+def order_cache_key(lookup_id: str) -> str:
+    """
+    Returns the cache key of GET /order/{lookup_id}.
+
+    Args:
+        lookup_id (str): Order identifier or background task id the order was requested by.
+    """
+    return build_cache_key(f"{CACHE_PREFIX}:{ORDER_NAMESPACE}", ORDER_ROUTE, {'order_id': {'id': lookup_id}})
@@ -7,15 +7,28 @@ import asyncio
 
 from loguru import logger
 from celery import Celery, current_task
-from fastapi_cache import FastAPICache
+from celery.signals import worker_process_init, worker_process_shutdown
 from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 
+from src.cache.backend import init_cache
 from src.config import settings
+from src.database.database import engine
+from src.models.order_types.registry import order_type_registry
+from src.pricing.exchange_rate import fx_client
+from src.worker.reprice import reprice_orders
 from src.worker.task_celery import process_create_order
 
 app_celery = Celery('tasks', broker=settings.RABBIT_URL, backend=settings.REDIS_URL)
 
+# Started by celery beat, run the worker with -B or a separate beat process
+app_celery.conf.beat_schedule = {
+    'reprice-orders': {
+        'task': 'src.cel_app.reprice_orders_task',
+        'schedule': settings.REPRICE_INTERVAL,
+    },
+}
+
 logger.remove()
 logger.add(
     "".join(
@@ -36,7 +49,21 @@ logger.add(
 loop = asyncio.get_event_loop()
 
 redis = aioredis.from_url(settings.REDIS_URL)
-FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+init_cache(RedisBackend(redis))
+
+
+@worker_process_init.connect
+def start_worker_process(**kwargs):
+    # Connections inherited from the parent process must not be shared with it
+    loop.run_until_complete(engine.dispose(close=False))
+    loop.run_until_complete(fx_client.start())
+    loop.run_until_complete(order_type_registry.start(redis))
+
+
+@worker_process_shutdown.connect
+def stop_worker_process(**kwargs):
+    loop.run_until_complete(order_type_registry.close())
+    loop.run_until_complete(fx_client.close())
 
 
 @app_celery.task(name='src.cel_app.create_order_task')
@@ -68,3 +95,19 @@ def create_order_task(payload, cookie_id):
     })
 
     return loop.run_until_complete(process_create_order(payload))
+
+
+@app_celery.task(name='src.cel_app.reprice_orders_task')
+def reprice_orders_task():
+    """
+    Celery task that sets the delivery cost of all orders that do not have one yet.
+
+    Runs every REPRICE_INTERVAL seconds by celery beat, can also be started on demand
+    through POST /api/v1/order/reprice.
+
+    Returns:
+        dict: Status of the run, number of updated orders and rows per second.
+    """
+
+    logger.info(f'INFO CELERY Reprice orders task[{current_task.request.id}]')
+    return loop.run_until_complete(reprice_orders())
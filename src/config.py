@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel
@@ -45,8 +46,98 @@ class Settings(BaseSettings):
 
     REDIS_URL: str
 
+    # Key of the HMAC signature of session cookies
+    SESSION_SECRET: str
+
     RMQ_QUEUE: str = 'order_queue'
 
+    # Connection pool of each process: POOL_SIZE kept open, up to MAX_OVERFLOW more under load,
+    # a checkout waits at most POOL_TIMEOUT seconds, connections older than POOL_RECYCLE seconds are replaced
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Prepared statements cached per connection by asyncpg, 0 when running behind PgBouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Server-side limits of every connection in milliseconds, 0 disables a limit
+    DB_STATEMENT_TIMEOUT: int = 30000
+    DB_IDLE_IN_TRANSACTION_TIMEOUT: int = 60000
+
+    # Read replicas used by @read_only_transaction, JSON list of postgresql+asyncpg:// URLs, empty reads the primary.
+    # A replica that fails is skipped for DB_REPLICA_RETRY_AFTER seconds, a client that has just written
+    # reads the primary for DB_READ_PRIMARY_AFTER_WRITE seconds
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_RETRY_AFTER: int = 30
+    DB_READ_PRIMARY_AFTER_WRITE: int = 10
+
+    # Maximum number of orders accepted by one batch registration request
+    ORDER_BATCH_MAX_SIZE: int = 1000
+
+    # Publishing of the API: 'confirm' waits for publisher confirms, at most RMQ_MAX_OUTSTANDING_CONFIRMS at once,
+    # 'transaction' commits an AMQP transaction per request. Publishes are spread over RMQ_CHANNEL_POOL_SIZE channels
+    RMQ_PUBLISH_MODE: Literal['confirm', 'transaction'] = 'confirm'
+    RMQ_CHANNEL_POOL_SIZE: int = 4
+    RMQ_MAX_OUTSTANDING_CONFIRMS: int = 256
+
+    # Encoding of published order messages. Consumers read both by the content_type of a message, so all of them
+    # have to be upgraded before publishers switch to 'msgpack'
+    RMQ_CODEC: Literal['json', 'msgpack'] = 'json'
+
+    # Publisher coalescing: orders sent by concurrent requests within RMQ_COALESCE_TIMEOUT_MS are published
+    # as one batch message of up to RMQ_COALESCE_SIZE orders
+    RMQ_COALESCE_ENABLED: bool = False
+    RMQ_COALESCE_SIZE: int = 100
+    RMQ_COALESCE_TIMEOUT_MS: int = 2
+
+    # Consumer micro-batching: store up to CONSUMER_BATCH_SIZE messages in one transaction,
+    # waiting at most CONSUMER_BATCH_TIMEOUT_MS for the batch to fill
+    CONSUMER_BATCH_ENABLED: bool = False
+    CONSUMER_BATCH_SIZE: int = 100
+    CONSUMER_BATCH_TIMEOUT_MS: int = 50
+
+    # Exchange rate provider, one pooled HTTP client per process
+    FX_RATE_BASE_URL: str = 'https://www.cbr-xml-daily.ru'
+    FX_RATE_PATH: str = '/daily_json.js'
+    FX_CONNECT_TIMEOUT: float = 2.0
+    FX_READ_TIMEOUT: float = 5.0
+    FX_MAX_CONNECTIONS: int = 10
+
+    # In-process USD exchange rate cache, refreshed in the background REFRESH_AHEAD seconds before expiry.
+    # While the provider fails, the last rate is served at most MAX_STALE seconds past its expiry
+    FX_RATE_TTL: int = 300
+    FX_RATE_REFRESH_AHEAD: int = 30
+    FX_RATE_MAX_STALE: int = 600
+
+    # Process-local tier in front of the Redis cache of the API and the consumer: up to CACHE_LOCAL_MAX_BYTES
+    # of responses, each kept for at most CACHE_LOCAL_TTL seconds, invalidations arrive through Redis pub/sub
+    CACHE_LOCAL_ENABLED: bool = False
+    CACHE_LOCAL_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_LOCAL_TTL: int = 30
+
+    # Lifetime of cached GET /order/{order_id} responses, entries are dropped as soon as the order changes
+    ORDER_CACHE_TTL: int = 6 * 60 * 60
+
+    # Lifetime of the order statuses answering GET /order/status/{task_id}, counted from the last change
+    ORDER_STATUS_TTL: int = 24 * 60 * 60
+
+    # Seconds GET /order/status/{task_id}/wait holds a request until the order is priced, by default and at most
+    ORDER_WAIT_TIMEOUT: float = 25.0
+    ORDER_WAIT_MAX_TIMEOUT: float = 60.0
+
+    # Periodic repricing of orders without a delivery cost
+    REPRICE_INTERVAL: int = 300
+    REPRICE_CHUNK_SIZE: int = 1000
+    REPRICE_LOCK_TIMEOUT: int = 120
+
+    # Rows read at once by the tariff what-if calculation
+    WHAT_IF_CHUNK_SIZE: int = 50000
+
+    # Rows read and sent at once by the order export
+    EXPORT_CHUNK_SIZE: int = 1000
+
     CLIENT_ORIGIN: str = 'http://localhost:8000'
 
     ROOT_PATH: Path = Path(__file__).parent.parent
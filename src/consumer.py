@@ -7,11 +7,13 @@ import asyncio
 
 from loguru import logger
 import aio_pika
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 
+from src.models.order_types.registry import order_type_registry
+from src.pika.batcher import MessageBatcher
 from src.pika.router import message_router
+from src.pricing.exchange_rate import fx_client
+from src.cache.backend import start_cache, stop_cache
 from src.config import settings
 
 PARALLEL_TASKS = 10
@@ -32,26 +34,40 @@ logger.add(
 )
 
 redis = aioredis.from_url(settings.REDIS_URL)
-FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
 
 
 async def main() -> None:
     connection = await aio_pika.connect_robust(settings.RABBIT_URL)
+    cache_backend = await start_cache(redis)
+    await fx_client.start()
+    await order_type_registry.start(redis)
 
     queue_name = settings.RMQ_QUEUE
 
+    batcher = None
+    prefetch_count = PARALLEL_TASKS
+    if settings.CONSUMER_BATCH_ENABLED:
+        batcher = MessageBatcher(settings.CONSUMER_BATCH_SIZE, settings.CONSUMER_BATCH_TIMEOUT_MS)
+        # Room for the next batch to fill up while the previous one is being stored
+        prefetch_count = 2 * settings.CONSUMER_BATCH_SIZE
+
     async with connection:
         channel = await connection.channel()
-        await channel.set_qos(prefetch_count=PARALLEL_TASKS)
+        await channel.set_qos(prefetch_count=prefetch_count)
         queue = await channel.declare_queue(queue_name, auto_delete=True)
 
         logger.info("Starting RabbitMQ")
 
-        await queue.consume(message_router)
+        await queue.consume(batcher or message_router)
 
         try:
             await asyncio.Future()
         finally:
+            if batcher is not None:
+                await batcher.close()
+            await order_type_registry.close()
+            await fx_client.close()
+            await stop_cache(cache_backend)
             await connection.close()
 
 
@@ -0,0 +1,72 @@
+"""
+Triggers keeping order_counts in step with orders.
+
+The statements are run by the order_counts migration and, for databases built with Base.metadata.create_all such as
+the test database, when the orders table is created.
+"""
+
+# Transition tables of a statement and the sign their rows are counted with, per triggering operation
+_CHANGES = {
+    'INSERT': (('new_rows', 1),),
+    'UPDATE': (('old_rows', -1), ('new_rows', 1)),
+    'DELETE': (('old_rows', -1),),
+}
+
+_REFERENCING = {
+    'INSERT': 'REFERENCING NEW TABLE AS new_rows',
+    'UPDATE': 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows',
+    'DELETE': 'REFERENCING OLD TABLE AS old_rows',
+}
+
+
+def _function(operation: str) -> str:
+    changes = '\n            UNION ALL\n            '.join(
+        f"SELECT session_uuid, order_type_name, delivery_cost, {sign} AS delta FROM {table}"
+        for table, sign in _CHANGES[operation]
+    )
+    # One upsert per statement, not per row: a reprice batch touches a handful of counters instead of a row
+    # lock per order. Counters are locked in key order, so concurrent statements cannot deadlock on them.
+    return f"""
+CREATE OR REPLACE FUNCTION order_counts_after_{operation.lower()}() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO order_counts AS counts (session_uuid, order_type_name, calculated, count)
+    SELECT session_uuid, coalesce(order_type_name, ''), delivery_cost IS NOT NULL, sum(delta)
+    FROM (
+            {changes}
+    ) AS changes
+    WHERE session_uuid IS NOT NULL
+    GROUP BY 1, 2, 3
+    HAVING sum(delta) <> 0
+    ORDER BY 1, 2, 3
+    ON CONFLICT (session_uuid, order_type_name, calculated) DO UPDATE SET count = counts.count + excluded.count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql"""
+
+
+def _trigger(operation: str) -> str:
+    return (
+        f"CREATE TRIGGER orders_counts_after_{operation.lower()} AFTER {operation} ON orders "
+        f"{_REFERENCING[operation]} FOR EACH STATEMENT EXECUTE FUNCTION order_counts_after_{operation.lower()}()"
+    )
+
+
+# Creates the trigger functions and the triggers, order_counts has to exist before orders are written
+CREATE_ORDER_COUNTS_TRIGGERS: tuple[str, ...] = (
+    *(_function(operation) for operation in _CHANGES),
+    *(_trigger(operation) for operation in _CHANGES),
+)
+
+DROP_ORDER_COUNTS_TRIGGERS: tuple[str, ...] = (
+    *(f"DROP TRIGGER IF EXISTS orders_counts_after_{operation.lower()} ON orders" for operation in _CHANGES),
+    *(f"DROP FUNCTION IF EXISTS order_counts_after_{operation.lower()}()" for operation in _CHANGES),
+)
+
+# Counts the orders that exist when the triggers are created
+FILL_ORDER_COUNTS = """
+INSERT INTO order_counts (session_uuid, order_type_name, calculated, count)
+SELECT session_uuid, coalesce(order_type_name, ''), delivery_cost IS NOT NULL, count(*)
+FROM orders
+WHERE session_uuid IS NOT NULL
+GROUP BY 1, 2, 3
+"""
@@ -1,3 +1,4 @@
+import time
 from contextvars import ContextVar
 
 from sqlalchemy.ext.asyncio import (
@@ -8,37 +9,93 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.exc import IntegrityError, PendingRollbackError
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from fastapi import HTTPException, status
 
 from src.config import settings
+from src.metrics import metrics
 
 DATABASE_URL = settings.DB_URL
 
-engine: AsyncEngine = create_async_engine(DATABASE_URL)
 
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool that records how long every checkout waited for a connection.
 
-class Base(DeclarativeBase):
-    pass
+    The wait includes opening a new connection when the pool grows into its overflow, a growing
+    db.pool.checkout_wait means the pool is too small for the load of the process.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe('db.pool.checkout_wait', time.perf_counter() - started)
 
 
-def get_session(engine: AsyncEngine | None = engine) -> AsyncSession:
-    Session: async_sessionmaker = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
+def create_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Creates an engine with the pool, statement cache and timeouts from settings.
+
+    Args:
+        url (str): Database URL.
+
+    Returns:
+        AsyncEngine: The configured engine.
+    """
+    return create_async_engine(
+        url,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Cache of the SQLAlchemy dialect and the cache of asyncpg itself
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'server_settings': {
+                'statement_timeout': str(settings.DB_STATEMENT_TIMEOUT),
+                'idle_in_transaction_session_timeout': str(settings.DB_IDLE_IN_TRANSACTION_TIMEOUT),
+            },
+        },
     )
-    return Session()
 
 
-CTX_SESSION: ContextVar[AsyncSession] = ContextVar(
-    'session', default=get_session()
+engine: AsyncEngine = create_engine()
+
+# Built once per process, every session shares the pool of the engine
+session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+class Base(DeclarativeBase):
+    pass
+
+
+def get_session() -> AsyncSession:
+    return session_factory()
+
+
+# Session of the current transaction. Every asyncio task gets a copy of the context, so concurrent requests and
+# consumer coroutines each see the session of their own @transaction.
+CTX_SESSION: ContextVar[AsyncSession | None] = ContextVar('session', default=None)
+
+
 class Session:
     # All sqlalchemy errors that can be raised
     _ERRORS = (IntegrityError, PendingRollbackError)
 
-    def __init__(self) -> None:
-        self._session: AsyncSession = CTX_SESSION.get()
+    @property
+    def _session(self) -> AsyncSession:
+        # Resolved on every use: repositories are built by dependencies before @transaction opens the session
+        session = CTX_SESSION.get()
+        if session is None:
+            raise RuntimeError("No database session in scope, wrap the call in @transaction or session_scope()")
+        return session
 
     async def execute(self, query):
         try:
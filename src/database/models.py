@@ -1,9 +1,12 @@
 import uuid
 from typing import TypeVar
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric
+from sqlalchemy import (
+    Column, Integer, BigInteger, Boolean, String, ForeignKey, Numeric, DateTime, Index, DDL, event, func, text
+)
 from sqlalchemy.orm import relationship
 
+from src.database.counters import CREATE_ORDER_COUNTS_TRIGGERS
 from src.database.database import Base
 
 ConcreteTable = TypeVar("ConcreteTable", bound=Base)
@@ -21,23 +24,59 @@ class UserSession(Base):
 
 class Order(Base):
     __tablename__ = 'orders'
-    __table_args__ = {'extend_existing': True}
-
-    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # Keyset pagination: one index per sort key, prefixed by the session filter
+        Index('ix_orders_session_uuid_id', 'session_uuid', 'id'),
+        Index('ix_orders_session_uuid_cost_id', 'session_uuid', 'cost', 'id'),
+        Index('ix_orders_session_uuid_delivery_cost_id', 'session_uuid', 'delivery_cost', 'id'),
+        Index('ix_orders_session_uuid_created_at_id', 'session_uuid', 'created_at', 'id'),
+        Index('ix_orders_session_uuid_order_type_name_id', 'session_uuid', 'order_type_name', 'id'),
+        Index(
+            'ix_orders_session_uuid_id_not_calculated', 'session_uuid', 'id',
+            postgresql_where=text("delivery_cost IS NULL")
+        ),
+        {'extend_existing': True},
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String)
     weight = Column(Numeric(precision=10, scale=3))
     cost = Column(Numeric(precision=10, scale=2))
-    delivery_cost = Column(String, default='Не рассчитана')
+    delivery_cost = Column(Numeric(precision=12, scale=2), nullable=True)  # NULL until calculated
 
     session_uuid = Column(String, ForeignKey('user_sessions.session_id'))
     user_session = relationship('UserSession', back_populates='orders')
 
-    order_type_name = Column(String, ForeignKey(
-        'order_types.name'))  # Здесь используется имя типа заказа в качестве ключа
-    order_type = relationship('OrderType')
+    # Имя типа заказа, проверяется по order_type_registry до записи, без внешнего ключа
+    order_type_name = Column(String)
+    order_type = relationship(
+        'OrderType', primaryjoin='foreign(Order.order_type_name) == OrderType.name', viewonly=True
+    )
 
     background_task_id = Column(String, unique=True, nullable=True, default=None)
 
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class OrderCount(Base):
+    """
+    Number of orders of a session per order type and per calculated delivery cost.
+
+    Maintained by the triggers of src/database/counters.py on every write to orders, so totals of the order list
+    are read from a few rows instead of counting the orders. Orders without a type are counted under ''.
+    """
+    __tablename__ = 'order_counts'
+    __table_args__ = {'extend_existing': True}
+
+    session_uuid = Column(String, primary_key=True)
+    order_type_name = Column(String, primary_key=True)
+    calculated = Column(Boolean, primary_key=True)
+    count = Column(BigInteger, nullable=False, server_default='0')
+
+
+for statement in CREATE_ORDER_COUNTS_TRIGGERS:
+    event.listen(Order.__table__, 'after_create', DDL(statement))
+
 
 class OrderType(Base):
     __tablename__ = 'order_types'
@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    """
+    A single page of results returned by a repository.
+
+    Attributes:
+        items (list[T]): Objects on the current page.
+        next_cursor (str | None): Opaque token for the next page, None if this is the last page.
+        total (int | None): Number of results on all pages, None if not counted.
+    """
+
+    items: list[T] = field(default_factory=list)
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+def encode_cursor(sort_by: str, value: Any, id: str) -> str:
+    """
+    Builds an opaque keyset cursor from the last row of a page.
+
+    Args:
+        sort_by (str): Name of the sort key the page was ordered by.
+        value (Any): Value of the sort key in the last row.
+        id (str): Identifier of the last row, used as a tie-breaker.
+
+    Returns:
+        str: URL-safe cursor token.
+    """
+    # Sort key values are kept as strings, so a cursor holds the same types whatever the column type is
+    raw = json.dumps([sort_by, None if value is None else str(value), id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple[str | None, str]:
+    """
+    Restores the sort key value and the row identifier from a cursor token.
+
+    Args:
+        cursor (str): Cursor token returned by encode_cursor.
+        sort_by (str): Sort key of the current request.
+
+    Returns:
+        tuple[str | None, str]: Sort key value as a string, None for a NULL value, and row identifier.
+
+    Raises:
+        HTTPException: If the cursor is malformed, holds values of wrong types or was issued for another sort key
+            (status code 400).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort_by, value, id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if not isinstance(id, str) or not isinstance(value, str | None):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if cursor_sort_by != sort_by:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort order")
+
+    return value, id
@@ -0,0 +1,116 @@
+import itertools
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.database.database import create_engine
+from src.metrics import metrics
+
+# Set for clients that have written recently, their reads go to the primary until the cookie expires
+READ_PRIMARY_COOKIE = 'read_primary'
+
+# Whether read-only transactions of the current request have to use the primary
+CTX_USE_PRIMARY: ContextVar[bool] = ContextVar('use_primary', default=False)
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    session_factory: async_sessionmaker[AsyncSession]
+    down_until: float = field(default=0.0)
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+
+class ReplicaRouter:
+    """
+    Round-robin selection of the read replica for the next read-only transaction.
+
+    Connections are checked before use by the pre-ping of the pool. A replica whose connection or query fails
+    is marked down and skipped for retry_after seconds, after that it gets traffic again and is marked down
+    again if it still fails. When no replica is healthy, reads go to the primary.
+
+    Usage:
+        replica = replica_router.choose()
+        if replica is None:
+            # read from the primary
+    """
+
+    def __init__(self, urls: list[str], retry_after: float) -> None:
+        self.replicas = [
+            Replica(engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+            for engine in map(create_engine, urls)
+        ]
+        self._retry_after = retry_after
+        self._counter = itertools.count()
+
+    def choose(self) -> Replica | None:
+        """Returns the next healthy replica, or None if reads have to go to the primary."""
+        if not self.replicas:
+            return None
+
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+
+        metrics.inc('db.replica.fallback')
+        return None
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        """Takes the replica out of rotation for retry_after seconds."""
+        replica.down_until = time.monotonic() + self._retry_after
+        metrics.inc('db.replica.down')
+        logger.warning(f"Read replica {replica.name} failed, skipping it for {self._retry_after}s: {error}")
+
+    async def dispose(self) -> None:
+        """Closes the connection pools of all replicas."""
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(settings.DB_REPLICA_URLS, settings.DB_REPLICA_RETRY_AFTER)
+
+
+def mark_recent_write(response: Response) -> None:
+    """
+    Makes the following reads of the client go to the primary for DB_READ_PRIMARY_AFTER_WRITE seconds,
+    so the client does not miss its own write on a lagging replica.
+
+    Args:
+        response (Response): FastAPI response object to set cookies.
+    """
+    response.set_cookie(key=READ_PRIMARY_COOKIE, value='1', max_age=settings.DB_READ_PRIMARY_AFTER_WRITE)
+
+
+async def read_preference(request: Request) -> None:
+    """
+    Dependency of the read endpoints, routes their read-only transactions to the primary after a recent write.
+
+    Args:
+        request (Request): FastAPI request object to retrieve cookies.
+    """
+    if request.cookies.get(READ_PRIMARY_COOKIE):
+        CTX_USE_PRIMARY.set(True)
+
+
+async def read_primary() -> None:
+    """
+    Dependency of read endpoints whose responses are cached, routes their read-only transactions to the primary.
+
+    A cached entry is dropped right after the change is committed on the primary, a replica lagging behind would
+    let the next cache miss store the old version again for the whole lifetime of the entry.
+    """
+    CTX_USE_PRIMARY.set(True)
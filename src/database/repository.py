@@ -1,12 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Generic, Type
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Generic, Sequence, Type
 
-from sqlalchemy import select, or_, update, Result
+from sqlalchemy import select, insert, or_, and_, update, tuple_, Result, Row, Select
 from fastapi import HTTPException
 from starlette import status
 
 from src.database.database import Session
 from src.database.models import ConcreteTable
+from src.database.pagination import Page, encode_cursor, decode_cursor
 
 
 class AbstractRepository(ABC):
@@ -14,12 +17,16 @@ class AbstractRepository(ABC):
     async def create(self, **kwargs):
         raise NotImplemented
 
+    @abstractmethod
+    async def create_many(self, **kwargs):
+        raise NotImplemented
+
     @abstractmethod
     async def update(self, **kwargs):
         raise NotImplemented
 
     @abstractmethod
-    async def find_one(self, **kwargs):
+    async def find_by_id(self, **kwargs):
         raise NotImplemented
 
     @abstractmethod
@@ -46,6 +53,9 @@ class SQLAlchemyRepository(AbstractRepository, Session, Generic[ConcreteTable]):
 
     model: Type[ConcreteTable]
 
+    # Sort keys that may hold NULL, NULLs are placed after all values in ascending order
+    nullable_sort_keys: frozenset[str] = frozenset({'delivery_cost'})
+
     def __init__(self):
         """
         Initializes the SQLAlchemyRepository instance.
@@ -84,6 +94,28 @@ class SQLAlchemyRepository(AbstractRepository, Session, Generic[ConcreteTable]):
             print(f'ERROR {e}')
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error")
 
+    async def create_many(self, payloads: list[dict]) -> list:
+        """
+        Creates objects of type ConcreteTable from a list of data dictionaries with a multi-row INSERT.
+
+        Args:
+            payloads (list[dict]): Data dictionaries for creating the objects.
+
+        Returns:
+            list: Identifiers of the created objects, in the order of payloads.
+
+        Raises:
+            HTTPException: If there is a database error (status code 500).
+        """
+        stmt = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+        try:
+            # A list of parameter sets is sent as INSERT ... VALUES (...), (...) RETURNING
+            result: Result = await self._session.execute(stmt, payloads)
+            return list(result.scalars().all())
+        except self._ERRORS as e:
+            print(f'ERROR {e}')
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error")
+
     async def update(self, update_data: dict, id: str) -> str:
         """
         Updates data of an existing ConcreteTable object identified by id.
@@ -114,30 +146,26 @@ class SQLAlchemyRepository(AbstractRepository, Session, Generic[ConcreteTable]):
 
         return _result
 
-    async def find_one(self, id: str) -> ConcreteTable:
+    async def find_by_id(self, id: str, columns: Sequence[str] | None = None) -> ConcreteTable | Row | None:
         """
-        Finds a single ConcreteTable object by order_id or Celery task id.
+        Finds a single ConcreteTable object by its primary key.
 
         Args:
-            order_id (str): Order identifier or Celery task id.
+            id (str): Identifier of the object.
+            columns (Sequence[str] | None): Columns to select into a plain row instead of loading the object.
 
         Returns:
-            ConcreteTable: Found ConcreteTable object.
-
-        Raises:
-            HTTPException: If no objects are found (status code 404).
+            ConcreteTable | Row | None: Found ConcreteTable object, or its row when columns are given,
+            None if there is no such object.
         """
-        query = (
-            select(self.model)
-            .where(or_(self.model.celery_task_id == id, self.model.id == id))
-        )
+        return await self._find_one(self.model.id == id, columns)
 
-        result: Result = await self.execute(query)
-
-        if not (_result := result.scalar_one_or_none()):
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not found')
-
-        return _result
+    async def _find_one(self, condition, columns: Sequence[str] | None = None) -> ConcreteTable | Row | None:
+        """
+        Selects the single object matching a condition on a unique column.
+        """
+        result: Result = await self.execute(self._select(columns).where(condition))
+        return result.scalar_one_or_none() if columns is None else result.one_or_none()
 
     async def find_all(self) -> list[ConcreteTable]:
         """
@@ -157,51 +185,207 @@ class SQLAlchemyRepository(AbstractRepository, Session, Generic[ConcreteTable]):
 
         return _result
 
+    async def stream(self, query: Select, chunk_size: int = 10000) -> AsyncIterator[list[tuple]]:
+        """
+        Reads the rows of a query through a server-side cursor.
+
+        Only one chunk is held in memory at a time, so the size of the result does not matter.
+
+        Args:
+            query (Select): Query to read.
+            chunk_size (int): Number of rows fetched from the cursor at once.
+
+        Yields:
+            list[tuple]: Next chunk of rows.
+        """
+        result = await self._session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield partition
+
     async def get_orders_for_user(
             self,
             order_type: str | None,
             delivery_cost: bool | None,
             cookie_id: str,
             page: int,
-            page_size: int
-    ) -> list[ConcreteTable]:
+            page_size: int,
+            sort_by: str = 'id',
+            cursor: str | None = None,
+            columns: Sequence[str] | None = None
+    ) -> Page[ConcreteTable | Row]:
         """
         Retrieves orders for a specific user with optional filters for order type and delivery cost.
 
+        Without a cursor the page is selected with OFFSET, with a cursor the query seeks past the last row of the
+        previous page, so deep pages cost the same as the first one.
+
         Args:
             order_type (str | None): Optional filter for order type.
             delivery_cost (bool | None): Optional filter for delivery cost presence.
             cookie_id (str): Unique identifier of the user.
-            page (int): Page number for pagination.
+            page (int): Page number for pagination, ignored when cursor is given.
             page_size (int): Number of items per page.
+            sort_by (str): Column to sort by, ties are broken by id.
+            cursor (str | None): Opaque token returned as next_cursor of the previous page.
+            columns (Sequence[str] | None): Columns to select into plain rows instead of loading objects,
+                id and the sort column are added if missing.
 
         Returns:
-            list[ConcreteTable]: List of orders for the user with applied filters.
+            Page[ConcreteTable | Row]: Orders for the user with applied filters and the cursor of the next page.
 
         Raises:
-            HTTPException: If no orders are found (status code 404).
+            HTTPException: If no orders are found (status code 404) or the cursor is invalid (status code 400).
+        """
+        if columns is not None:
+            # The cursor is built from the last row
+            columns = list(columns)
+            for key in ('id', sort_by):
+                if key not in columns:
+                    columns.append(key)
+
+        query = self._orders_page_query(order_type, delivery_cost, cookie_id, sort_by, page_size, columns)
+
+        if cursor is not None:
+            value, last_id = decode_cursor(cursor, sort_by)
+            query = query.filter(self._after_cursor(sort_by, value, last_id))
+        else:
+            query = query.offset((page - 1) * page_size)
+
+        result: Result = await self.execute(query)
+
+        if not (_result := result.scalars().all() if columns is None else result.all()):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+        next_cursor = None
+        if len(_result) > page_size:
+            _result = _result[:page_size]
+            last = _result[-1]
+            next_cursor = encode_cursor(sort_by, getattr(last, sort_by), last.id)
+
+        return Page(items=list(_result), next_cursor=next_cursor)
+
+    def stream_orders_for_user(
+            self,
+            order_type: str | None,
+            delivery_cost: bool | None,
+            cookie_id: str,
+            columns: Sequence[str] | None = None,
+            chunk_size: int = 10000
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Reads all orders of a user in id order through a server-side cursor, with the filters of get_orders_for_user.
+
+        Args:
+            order_type (str | None): Optional filter for order type.
+            delivery_cost (bool | None): Optional filter for delivery cost presence.
+            cookie_id (str): Unique identifier of the user.
+            columns (Sequence[str] | None): Columns to select, without them every row holds the whole object.
+            chunk_size (int): Number of rows fetched from the cursor at once.
+
+        Returns:
+            AsyncIterator[list[Row]]: Chunks of order rows.
+        """
+        query = self._orders_for_user_query(order_type, delivery_cost, cookie_id, columns).order_by(self.model.id)
+        return self.stream(query, chunk_size)
+
+    @classmethod
+    def _select(cls, columns: Sequence[str] | None = None) -> Select:
+        """
+        Selects whole objects, or only the given columns as rows.
+
+        Rows are plain named tuples: they skip the identity map, attribute instrumentation and relationship loading
+        of ORM objects, which makes them much cheaper for read-only responses.
+        """
+        if columns is None:
+            return select(cls.model)
+        return select(*(getattr(cls.model, column) for column in columns))
+
+    @classmethod
+    def _orders_for_user_query(
+            cls,
+            order_type: str | None,
+            delivery_cost: bool | None,
+            cookie_id: str,
+            columns: Sequence[str] | None = None
+    ) -> Select:
+        """
+        Builds the filtered, unpaginated query behind get_orders_for_user.
+
+        Every combination of filters is covered by an index on orders: the per-sort-key indexes for the plain
+        session filter, (session_uuid, order_type_name, id) for the type filter and a partial index for orders
+        whose delivery cost is not calculated yet.
         """
         query = (
-            select(self.model)
-            .filter(self.model.session_uuid == cookie_id)
+            cls._select(columns)
+            .filter(cls.model.session_uuid == cookie_id)
         )
 
         if order_type is not None:
-            query = query.filter(self.model.order_type_name == order_type)
+            query = query.filter(cls.model.order_type_name == order_type)
 
         if delivery_cost is not None:
             if delivery_cost:
-                query = query.filter(self.model.delivery_cost != "Не рассчитана")
+                query = query.filter(cls.model.delivery_cost.is_not(None))
             else:
-                query = query.filter(self.model.delivery_cost == "Не рассчитана")
+                query = query.filter(cls.model.delivery_cost.is_(None))
 
-        offset = (page - 1) * page_size
-        limit = page_size
-        query = query.offset(offset).limit(limit)
+        return query
 
-        result: Result = await self.execute(query)
+    @classmethod
+    def _orders_page_query(
+            cls,
+            order_type: str | None,
+            delivery_cost: bool | None,
+            cookie_id: str,
+            sort_by: str,
+            page_size: int,
+            columns: Sequence[str] | None = None
+    ) -> Select:
+        """
+        Builds the query of one page of get_orders_for_user, before the cursor or the offset is applied.
+        """
+        # One extra row tells whether there is a next page
+        return (
+            cls._orders_for_user_query(order_type, delivery_cost, cookie_id, columns)
+            .order_by(getattr(cls.model, sort_by), cls.model.id)
+            .limit(page_size + 1)
+        )
 
-        if not (_result := result.scalars().all()):
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    def _after_cursor(self, sort_by: str, value: str | None, last_id: str):
+        """
+        Builds the keyset condition selecting rows that follow the cursor in (sort key, id) order.
 
-        return _result
+        Raises:
+            HTTPException: If the cursor holds a NULL value for a sort key that is never NULL (status code 400).
+        """
+        sort_column = getattr(self.model, sort_by)
+
+        if value is None and sort_by not in self.nullable_sort_keys:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+        if value is None:
+            # The cursor is already inside the trailing NULLs
+            return and_(sort_column.is_(None), self.model.id > last_id)
+
+        condition = tuple_(sort_column, self.model.id) > tuple_(self._cursor_value(sort_column, value), last_id)
+        if sort_by in self.nullable_sort_keys:
+            condition = or_(condition, sort_column.is_(None))
+        return condition
+
+    @staticmethod
+    def _cursor_value(column, value: Any) -> Any:
+        """
+        Converts a sort key value restored from a cursor back to the column type.
+
+        Raises:
+            HTTPException: If the value does not fit the column type (status code 400).
+        """
+        try:
+            python_type = column.type.python_type
+            if python_type is Decimal:
+                return Decimal(value)
+            if python_type is datetime:
+                return datetime.fromisoformat(value)
+            return python_type(value)
+        except (ArithmeticError, ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
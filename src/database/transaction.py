@@ -1,11 +1,43 @@
+from contextlib import asynccontextmanager
 from functools import wraps
+from typing import AsyncIterator
 
 from loguru import logger
-from sqlalchemy.exc import IntegrityError, PendingRollbackError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError, InterfaceError, OperationalError, PendingRollbackError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from fastapi import HTTPException
 
-from src.database.database import CTX_SESSION, get_session
+from src.database.database import CTX_SESSION, session_factory
+from src.database.replicas import CTX_USE_PRIMARY, replica_router
+
+# Errors of a replica that make a read-only transaction retry on the primary
+REPLICA_ERRORS = (InterfaceError, OperationalError, OSError)
+
+
+@asynccontextmanager
+async def session_scope(factory: async_sessionmaker[AsyncSession] = session_factory) -> AsyncIterator[AsyncSession]:
+    """
+    Opens a new session and makes it the session of the current task until the block exits.
+
+    The previous session of the task, if any, is restored on exit, so nested scopes do not leak into the caller.
+    The session is closed on exit, committing is up to the caller.
+
+    Usage:
+        async with session_scope() as session:
+            ...
+            await session.commit()
+    """
+    session: AsyncSession = factory()
+    token = CTX_SESSION.set(session)
+    try:
+        yield session
+    finally:
+        try:
+            CTX_SESSION.reset(token)
+        except ValueError:
+            # An abandoned async generator, e.g. of a streamed response, is closed from another context
+            pass
+        await session.close()
 
 
 def transaction(coro):
@@ -22,22 +54,75 @@ def transaction(coro):
     """
     @wraps(coro)
     async def inner(*args, **kwargs):
-        session: AsyncSession = get_session()
-        CTX_SESSION.set(session)
+        async with session_scope() as session:
+            try:
+                result = await coro(*args, **kwargs)
+                await session.commit()
+                return result
+            except HTTPException as error:
+                logger.opt(exception=True).error(f"Rolling back changes.\n{error.detail}", exc_info=True)
+                await session.rollback()
+                raise error
+            except (IntegrityError, PendingRollbackError) as error:
+                logger.error(f"Rolling back changes.\n{error}", exc_info=True)
+                await session.rollback()
 
-        try:
-            result = await coro(*args, **kwargs)
-            await session.commit()
-            return result
-        except HTTPException as error:
-            logger.opt(exception=True).error(f"Rolling back changes.\n{error.detail}", exc_info=True)
-            await session.rollback()
-            raise error
-        except (IntegrityError, PendingRollbackError) as error:
-            logger.error(f"Rolling back changes.\n{error.detail}", exc_info=True)
-            await session.rollback()
-        finally:
-            await session.close()
+    return inner
+
+
+def read_only_transaction(coro):
+    """
+    Decorator for read-only endpoints, runs the coroutine in a session of a read replica.
+
+    Nothing is committed, the session is closed when the coroutine returns. The primary is used when no replica
+    is configured or healthy, and when the request asked for it through read_preference. If the replica fails,
+    it is taken out of rotation and the coroutine is run once more on the primary.
+
+    Usage:
+        @read_only_transaction
+        async def some_async_function(...):
+                ...
+
+    :param coro: Coroutine function to decorate.
+    :return: Decorated coroutine function reading from a replica.
+    """
+    @wraps(coro)
+    async def inner(*args, **kwargs):
+        replica = None if CTX_USE_PRIMARY.get() else replica_router.choose()
+        if replica is not None:
+            try:
+                async with session_scope(replica.session_factory):
+                    return await coro(*args, **kwargs)
+            except REPLICA_ERRORS as error:
+                replica_router.mark_down(replica, error)
+
+        async with session_scope():
+            return await coro(*args, **kwargs)
 
     return inner
 
+
+@asynccontextmanager
+async def read_only_session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    Opens a read-only session on a replica like read_only_transaction, for reads that cannot be repeated,
+    such as a streamed response whose first rows are already sent.
+
+    A replica that fails is taken out of rotation, the error is raised to the caller. Nothing is committed.
+
+    Usage:
+        async with read_only_session_scope():
+            ...
+    """
+    replica = None if CTX_USE_PRIMARY.get() else replica_router.choose()
+    if replica is None:
+        async with session_scope() as session:
+            yield session
+        return
+
+    try:
+        async with session_scope(replica.session_factory) as session:
+            yield session
+    except REPLICA_ERRORS as error:
+        replica_router.mark_down(replica, error)
+        raise
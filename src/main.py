@@ -6,17 +6,23 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from loguru import logger
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 
+from src.cache.backend import start_cache, stop_cache
 from src.config import settings
+from src.database.replicas import replica_router
+from src.models.order.status import order_status_notifier
+from src.models.order_types.registry import order_type_registry
+from src.models.user_session.task.tasks_cookie import accept_legacy_session_cookie, set_session_cookie
 from src.pika.config.rabbit_connection import rabbit_connection
+from src.pricing.exchange_rate import fx_client
 from src.routers.order import router as router_order
 from src.routers.order_type import router as router_type
 from src.routers.order_create_RMQ import router as router_create_RMQ
+from src.routers.metrics import router as router_metrics
+from src.routers.pricing import router as router_pricing
 
 
 
@@ -39,10 +45,18 @@ logger.add(
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     redis = aioredis.from_url(settings.REDIS_URL)
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    cache_backend = await start_cache(redis)
     await rabbit_connection.connect()
+    await fx_client.start()
+    await order_type_registry.start(redis)
+    await order_status_notifier.start(redis)
     yield
+    await order_status_notifier.close()
+    await order_type_registry.close()
+    await stop_cache(cache_backend)
+    await fx_client.close()
     await rabbit_connection.disconnect()
+    await replica_router.dispose()
 
 
 app = FastAPI(title="Order App", lifespan=lifespan)
@@ -53,6 +67,21 @@ app.include_router(router_type, prefix="/api/v1")
 
 app.include_router(router_create_RMQ, prefix="/api/v1")
 
+app.include_router(router_pricing, prefix="/api/v1")
+
+app.include_router(router_metrics, prefix="/api/v1")
+
+
+@app.middleware('http')
+async def reissue_legacy_session_cookie(request: Request, call_next):
+    # Cookies issued before they were signed keep their session and are replaced with a signed one
+    session_id = await accept_legacy_session_cookie(request)
+    response = await call_next(request)
+    if session_id is not None:
+        set_session_cookie(response, session_id)
+    return response
+
+
 origins = [
     settings.CLIENT_ORIGIN,
 ]
@@ -64,4 +93,5 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "PATH", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Set-Cookie", "Access-Control-Allow-Headers", "Access-Control-Allow-Origin",
                    "Authorization"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Has-Next"],
 )
@@ -0,0 +1,62 @@
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class Timing:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class Metrics:
+    """
+    Process-local counters and timings.
+
+    Every gunicorn worker, consumer and Celery worker keeps its own values, a snapshot reflects the process that
+    served it.
+
+    Usage:
+        metrics.inc('fx_rate.hit')
+        metrics.observe('db.pool.checkout_wait', 0.002)
+    """
+
+    def __init__(self) -> None:
+        self._counters: defaultdict[str, int] = defaultdict(int)
+        self._timings: defaultdict[str, Timing] = defaultdict(Timing)
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """Increments the counter name by value."""
+        self._counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Records one duration of the timing name."""
+        self._timings[name].observe(seconds)
+
+    def counter(self, name: str) -> int:
+        """Returns the current value of the counter name."""
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Returns all counters and timings of the process."""
+        return {
+            'pid': os.getpid(),
+            'counters': dict(self._counters),
+            'timings': {
+                name: {
+                    'count': timing.count,
+                    'avg': timing.total / timing.count if timing.count else 0.0,
+                    'max': timing.max,
+                }
+                for name, timing in self._timings.items()
+            },
+        }
+
+
+metrics = Metrics()
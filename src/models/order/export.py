@@ -0,0 +1,65 @@
+import csv
+import io
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy import Row
+
+from src.database.transaction import read_only_session_scope
+from src.models.order.schemas import ORDER_COLUMNS, ExportFormatEnum, dump_order_row
+
+MEDIA_TYPES = {
+    ExportFormatEnum.NDJSON: 'application/x-ndjson',
+    ExportFormatEnum.CSV: 'text/csv; charset=utf-8',
+}
+
+
+async def encode_ndjson(chunks: AsyncIterator[list[Row]]) -> AsyncIterator[bytes]:
+    """
+    Encodes chunks of order rows as NDJSON, one OrderSchemas object per line and one piece per chunk.
+    """
+    async for rows in chunks:
+        yield b''.join(orjson.dumps(dump_order_row(row)) + b'\n' for row in rows)
+
+
+async def encode_csv(chunks: AsyncIterator[list[Row]]) -> AsyncIterator[bytes]:
+    """
+    Encodes chunks of order rows as CSV with a header line, one piece per chunk.
+
+    The header is sent before the first rows are read.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ORDER_COLUMNS)
+
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(dump_order_row(row) for row in rows)
+        yield buffer.getvalue().encode()
+
+
+ENCODERS = {
+    ExportFormatEnum.NDJSON: encode_ndjson,
+    ExportFormatEnum.CSV: encode_csv,
+}
+
+
+async def stream_export(chunks: AsyncIterator[list[Row]], export_format: ExportFormatEnum) -> AsyncIterator[bytes]:
+    """
+    Body of a streamed export: reads the chunks in a read-only session of its own and encodes them.
+
+    The body is sent after the endpoint has returned, so it cannot use the session of the endpoint.
+
+    Args:
+        chunks (AsyncIterator[list[Row]]): Chunks of order rows, read when iterated.
+        export_format (ExportFormatEnum): Format of the export.
+
+    Yields:
+        bytes: Next piece of the body.
+    """
+    async with read_only_session_scope():
+        async for piece in ENCODERS[export_format](chunks):
+            yield piece
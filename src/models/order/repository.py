@@ -1,6 +1,138 @@
-from src.database.models import Order
+from decimal import Decimal
+from typing import AsyncIterator, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, func, Float, Result, Row
+from starlette import status
+
+from src.database.models import Order, OrderCount
 from src.database.repository import SQLAlchemyRepository
+from src.pricing.delivery import WEIGHT_RATE, COST_RATE
 
 
 class OrderRepository(SQLAlchemyRepository[Order]):
     model = Order
+
+    async def find_by_background_task_id(
+            self,
+            task_id: str,
+            columns: Sequence[str] | None = None
+    ) -> Order | Row | None:
+        """
+        Finds the order registered by a background task, through the unique index on background_task_id.
+
+        Args:
+            task_id (str): Background task id returned by the create endpoints.
+            columns (Sequence[str] | None): Columns to select into a plain row instead of loading the order.
+
+        Returns:
+            Order | Row | None: Found order, or its row when columns are given, None if it is not stored yet.
+        """
+        return await self._find_one(self.model.background_task_id == task_id, columns)
+
+    async def update_returning_task_id(self, update_data: dict, id: str) -> Row[tuple[str, str | None]]:
+        """
+        Updates an order like update and returns its background task id as well, with the same statement.
+
+        Args:
+            update_data (dict): Data dictionary with fields to update.
+            id (str): Identifier of the order to update.
+
+        Returns:
+            Row[tuple[str, str | None]]: Identifier and background task id of the updated order.
+
+        Raises:
+            HTTPException: If there is a database error (status code 500).
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**update_data)
+            .returning(self.model.id, self.model.background_task_id)
+        )
+        result: Result = await self.execute(stmt)
+
+        if not (_result := result.one_or_none()):
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error")
+
+        await self._session.commit()
+
+        return _result
+
+    async def price_uncalculated(
+            self,
+            usd_to_rub_rate: Decimal,
+            limit: int
+    ) -> list[Row[tuple[str, str | None, Decimal]]]:
+        """
+        Calculates the delivery cost of up to limit orders that have none, with one UPDATE statement.
+
+        Rows locked by a concurrent transaction are skipped rather than waited for.
+
+        Args:
+            usd_to_rub_rate (Decimal): USD to RUB exchange rate.
+            limit (int): Maximum number of orders to update.
+
+        Returns:
+            list[Row[tuple[str, str | None, Decimal]]]: Identifiers, background task ids and delivery costs of
+            the updated orders.
+        """
+        batch = (
+            select(self.model.id)
+            .where(
+                self.model.delivery_cost.is_(None),
+                self.model.weight.is_not(None),
+                self.model.cost.is_not(None)
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte('batch')
+        )
+        delivery_cost = func.round((self.model.weight * WEIGHT_RATE + self.model.cost * COST_RATE) * usd_to_rub_rate, 2)
+        stmt = (
+            update(self.model)
+            .where(self.model.id == batch.c.id)
+            .values(delivery_cost=delivery_cost)
+            .returning(self.model.id, self.model.background_task_id, self.model.delivery_cost)
+        )
+        result: Result = await self.execute(stmt)
+        return list(result.all())
+
+    async def count_for_user(self, order_type: str | None, delivery_cost: bool | None, cookie_id: str) -> int:
+        """
+        Counts the orders of a user with the filters of get_orders_for_user, from the counters in order_counts.
+
+        Args:
+            order_type (str | None): Optional filter for order type.
+            delivery_cost (bool | None): Optional filter for delivery cost presence.
+            cookie_id (str): Unique identifier of the user.
+
+        Returns:
+            int: Number of orders matching the filters.
+        """
+        query = select(func.coalesce(func.sum(OrderCount.count), 0)).where(OrderCount.session_uuid == cookie_id)
+
+        if order_type is not None:
+            query = query.where(OrderCount.order_type_name == order_type)
+
+        if delivery_cost is not None:
+            query = query.where(OrderCount.calculated.is_(delivery_cost))
+
+        result: Result = await self.execute(query)
+        return int(result.scalar_one())
+
+    def stream_weights_and_costs(self, chunk_size: int) -> AsyncIterator[list[tuple[float, float]]]:
+        """
+        Reads weight and cost of all orders as floats through a server-side cursor.
+
+        Args:
+            chunk_size (int): Number of rows fetched from the cursor at once.
+
+        Returns:
+            AsyncIterator[list[tuple[float, float]]]: Chunks of (weight, cost) rows.
+        """
+        query = (
+            select(self.model.weight.cast(Float), self.model.cost.cast(Float))
+            .where(self.model.weight.is_not(None), self.model.cost.is_not(None))
+        )
+        return self.stream(query, chunk_size)
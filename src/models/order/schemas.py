@@ -1,15 +1,38 @@
 from decimal import Decimal
+from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
+from sqlalchemy import Row
 
-from src.models.order_types.schemas import OrderTypeEnum
+from src.models.order_types.schemas import OrderTypeName
+
+# Shown instead of the delivery cost until it is calculated
+DELIVERY_COST_NOT_CALCULATED = 'Не рассчитана'
 
 
 class OrderIdSchemas(BaseModel):
     id: str
 
 
+class OrderSortEnum(str, Enum):
+    ID = 'id'
+    COST = 'cost'
+    DELIVERY_COST = 'delivery_cost'
+    CREATED_AT = 'created_at'
+
+
+class OrderStatusEnum(str, Enum):
+    QUEUED = 'queued'
+    PERSISTED = 'persisted'
+    PRICED = 'priced'
+
+
+class ExportFormatEnum(str, Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
 
 
 
@@ -31,7 +54,7 @@ class CreateOrderSchemas(BaseModel):
             "example": "22.22"
         }
     )
-    order_type_name: OrderTypeEnum = Field(
+    order_type_name: OrderTypeName = Field(
         default='Clothing',
         json_schema_extra={
             "description": "Type of the order",
@@ -44,7 +67,52 @@ class CreateOrderSchemas(BaseModel):
 
 class OrderSchemas(CreateOrderSchemas):
     id: str
-    delivery_cost: Optional[str] = Field(
+    # Stored orders are not checked against the registry again
+    order_type_name: str = Field(json_schema_extra={"description": "Type of the order"})
+    delivery_cost: Optional[Decimal] = Field(
         None,
         json_schema_extra={"description": "The delivery cost of the order, if calculated"}
     )
+
+    @field_serializer('delivery_cost')
+    def serialize_delivery_cost(self, delivery_cost: Optional[Decimal]) -> str:
+        if delivery_cost is None:
+            return DELIVERY_COST_NOT_CALCULATED
+        return str(delivery_cost)
+
+
+class OrderStatusSchemas(BaseModel):
+    task_id: str
+    status: OrderStatusEnum = Field(json_schema_extra={"description": "queued, persisted or priced"})
+    order_id: Optional[str] = Field(None, json_schema_extra={"description": "ID of the order, once persisted"})
+    delivery_cost: Optional[Decimal] = Field(
+        None,
+        json_schema_extra={"description": "The delivery cost of the order, once priced"}
+    )
+
+
+# Columns selected for OrderSchemas responses, in the order of its fields
+ORDER_COLUMNS = ('name', 'weight', 'cost', 'order_type_name', 'id', 'delivery_cost')
+
+
+def dump_order_row(row: Row) -> dict:
+    """
+    Converts a row of ORDER_COLUMNS to the JSON of OrderSchemas without validating it again.
+
+    Rows come from the database and are valid already, skipping the model saves a validation and
+    a serialization per order on list responses.
+
+    Args:
+        row (Row): Row with the ORDER_COLUMNS of an order.
+
+    Returns:
+        dict: Same content as OrderSchemas.model_dump(mode='json').
+    """
+    return {
+        'name': row.name,
+        'weight': None if row.weight is None else str(row.weight),
+        'cost': None if row.cost is None else str(row.cost),
+        'order_type_name': row.order_type_name,
+        'id': row.id,
+        'delivery_cost': DELIVERY_COST_NOT_CALCULATED if row.delivery_cost is None else str(row.delivery_cost),
+    }
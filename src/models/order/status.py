@@ -0,0 +1,190 @@
+import asyncio
+from decimal import Decimal
+from typing import Iterable
+
+import orjson
+from loguru import logger
+from redis.asyncio.client import Redis
+
+from src.config import settings
+from src.metrics import metrics
+from src.models.order.schemas import OrderStatusEnum
+from src.redis_client import redis_client
+
+# Prefix of the Redis keys of order statuses, followed by the background task id
+STATUS_PREFIX = 'order:status'
+
+# Carries the JSON list of statuses of newly priced orders to the waiters of every API process
+PRICED_CHANNEL = 'order:priced'
+
+# Seconds between attempts to subscribe to the priced channel again after an error
+RESUBSCRIBE_DELAY = 1.0
+
+
+class OrderStatusStore:
+    """
+    Statuses of registered orders in Redis, keyed by background task id.
+
+    The create endpoints record queued before publishing an order, the consumer and the Celery worker record
+    persisted or priced once the order is committed, the repricing worker records priced. Polls are answered from
+    Redis alone, priced statuses are also published on PRICED_CHANNEL for OrderStatusNotifier. Every write restarts
+    the TTL of the status. Errors are logged and not raised: the status is only a shortcut, GET /order/{task_id}
+    still answers from the database.
+
+    Usage:
+        await order_status_store.queued([task_id])
+        await order_status_store.stored([(task_id, order_id, delivery_cost)])
+        await order_status_store.get(task_id)
+    """
+
+    def __init__(self, redis: Redis, ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def key(task_id: str) -> str:
+        return f"{STATUS_PREFIX}:{task_id}"
+
+    async def queued(self, task_ids: Iterable[str]) -> None:
+        """Records that the orders of the task ids are sent to the queue."""
+        await self._set({task_id: {'status': OrderStatusEnum.QUEUED.value} for task_id in task_ids})
+
+    async def stored(self, orders: Iterable[tuple[str | None, str, Decimal | None]]) -> None:
+        """
+        Records committed orders as persisted, or as priced if their delivery cost is known.
+
+        Args:
+            orders (Iterable[tuple[str | None, str, Decimal | None]]): Background task id, order id and delivery
+                cost of each order, orders without a task id are skipped.
+        """
+        await self._set({
+            task_id: {
+                'status': (OrderStatusEnum.PERSISTED if delivery_cost is None else OrderStatusEnum.PRICED).value,
+                'order_id': order_id,
+                'delivery_cost': None if delivery_cost is None else str(delivery_cost),
+            }
+            for task_id, order_id, delivery_cost in orders
+            if task_id
+        })
+
+    async def get(self, task_id: str) -> dict | None:
+        """
+        Returns the status of a task id, like {'status': 'priced', 'order_id': ..., 'delivery_cost': '112.38'}.
+
+        Returns:
+            dict | None: The status, None if it is unknown or expired.
+        """
+        value = await self.redis.get(self.key(task_id))
+        return None if value is None else {'task_id': task_id, **orjson.loads(value)}
+
+    async def _set(self, statuses: dict[str, dict]) -> None:
+        if not statuses:
+            return
+
+        priced = [
+            {'task_id': task_id, **value}
+            for task_id, value in statuses.items()
+            if value['status'] == OrderStatusEnum.PRICED.value
+        ]
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for task_id, value in statuses.items():
+                    pipe.set(self.key(task_id), orjson.dumps(value), ex=self.ttl)
+                # Published after the statuses are stored, a waiter that misses the message finds them on its re-read
+                if priced:
+                    pipe.publish(PRICED_CHANNEL, orjson.dumps(priced))
+                await pipe.execute()
+        except Exception as e:
+            metrics.inc('order.status.error')
+            logger.error(f"Error in recording the status of {len(statuses)} orders: {e}")
+
+
+class OrderStatusNotifier:
+    """
+    Wakes requests waiting for orders to be priced, from one subscription to PRICED_CHANNEL per process.
+
+    A waiter is registered before the stored status is read, so a notification published in between is not lost.
+    If the subscription breaks, waiters are not woken and fall back to reading the store when they time out.
+
+    Usage:
+        await order_status_notifier.start(redis)
+        order_status = await order_status_notifier.wait_priced(task_id, timeout=25)
+        ...
+        await order_status_notifier.close()
+    """
+
+    def __init__(self, store: OrderStatusStore) -> None:
+        self.store = store
+        self._waiters: dict[str, set[asyncio.Future]] = {}
+        self._listener: asyncio.Task | None = None
+
+    async def start(self, redis: Redis) -> None:
+        """Subscribes to priced orders."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def close(self) -> None:
+        """Unsubscribes from priced orders."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def wait_priced(self, task_id: str, timeout: float) -> dict | None:
+        """
+        Waits until the order of a task id is priced, at most timeout seconds.
+
+        Args:
+            task_id (str): Background task id returned by the create endpoints.
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            dict | None: The status once priced, or the latest status on timeout, None if it is unknown or expired.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(task_id, set()).add(waiter)
+        try:
+            order_status = await self.store.get(task_id)
+            if order_status is None or order_status['status'] == OrderStatusEnum.PRICED.value:
+                return order_status
+
+            metrics.inc('order.status.wait')
+            try:
+                return await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                metrics.inc('order.status.wait_timeout')
+                return await self.store.get(task_id) or order_status
+        finally:
+            waiters = self._waiters.get(task_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[task_id]
+
+    def notify(self, statuses: list[dict]) -> None:
+        """Wakes the waiters of the given priced statuses."""
+        for order_status in statuses:
+            for waiter in self._waiters.get(order_status['task_id'], ()):
+                if not waiter.done():
+                    waiter.set_result(order_status)
+
+    async def _listen(self, redis: Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(PRICED_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.notify(orjson.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in listening for priced orders, waiters fall back to their timeout: {e}")
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+
+order_status_store = OrderStatusStore(redis_client, settings.ORDER_STATUS_TTL)
+order_status_notifier = OrderStatusNotifier(order_status_store)
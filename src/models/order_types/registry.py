@@ -0,0 +1,137 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+from dataclasses import dataclass
+
+from loguru import logger
+from redis.asyncio.client import Redis
+
+from src.database.transaction import session_scope
+from src.models.order_types.repository import OrderTypeRepository
+from src.redis_client import redis_client
+
+# Published when the order_types table changes, every process reloads its registry
+REFRESH_CHANNEL = 'order_types:refresh'
+
+# Seconds between attempts to subscribe to the refresh channel again after an error
+RESUBSCRIBE_DELAY = 1.0
+
+
+@dataclass(frozen=True)
+class OrderTypeEntry:
+    id: int
+    name: str
+
+
+# Rows of the order_types table, served until the registry is loaded from the database
+DEFAULT_ORDER_TYPES: tuple[OrderTypeEntry, ...] = (
+    OrderTypeEntry(1, 'Clothing'),
+    OrderTypeEntry(2, 'Electronics'),
+    OrderTypeEntry(3, 'Miscellaneous'),
+)
+
+
+class OrderTypeRegistry:
+    """
+    In-process copy of the order_types table.
+
+    The table is read once at startup of the API, the consumer and the Celery worker and afterwards only when
+    a refresh is published on REFRESH_CHANNEL. Readers get an immutable snapshot, a reload replaces it as a whole.
+
+    Usage:
+        await order_type_registry.start(redis)
+        'Clothing' in order_type_registry
+        order_type_registry.all()
+    """
+
+    def __init__(self, order_types: tuple[OrderTypeEntry, ...]) -> None:
+        self._set(order_types)
+        self._listener: asyncio.Task | None = None
+
+    def all(self) -> tuple[OrderTypeEntry, ...]:
+        """Returns all order types sorted by id."""
+        return self._order_types
+
+    def names(self) -> frozenset[str]:
+        """Returns the names of all order types."""
+        return self._names
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    async def load(self) -> None:
+        """
+        Reads the order types from the database.
+
+        If the database cannot be read, the order types loaded before, or DEFAULT_ORDER_TYPES, are kept, so a process
+        still starts while the database is unavailable.
+        """
+        try:
+            async with session_scope():
+                rows = await OrderTypeRepository().get_rows()
+        except Exception as e:
+            logger.error(f"Error in loading order types, keeping {', '.join(sorted(self._names)) or 'none'}: {e}")
+            return
+
+        self._set(tuple(OrderTypeEntry(row.id, row.name) for row in rows))
+        if not rows:
+            logger.warning("The order_types table is empty, no order can be created until it is filled and refreshed")
+            return
+        logger.info(f"Order types loaded: {', '.join(sorted(self._names))}")
+
+    async def start(self, redis: Redis) -> None:
+        """Loads the order types and subscribes to refreshes."""
+        await self.load()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def close(self) -> None:
+        """Unsubscribes from refreshes."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def _set(self, order_types: tuple[OrderTypeEntry, ...]) -> None:
+        self._order_types = order_types
+        self._names = frozenset(order_type.name for order_type in order_types)
+
+    async def _listen(self, redis: Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(REFRESH_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in refreshing order types, keeping the loaded ones: {e}")
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+
+order_type_registry = OrderTypeRegistry(DEFAULT_ORDER_TYPES)
+
+
+async def publish_refresh(redis: Redis) -> int:
+    """
+    Makes every process reload its order types, to be called after the order_types table is changed.
+
+    To run it from the terminal:
+    python src/models/order_types/registry.py
+
+    Returns:
+        int: Number of processes that received the refresh.
+    """
+    return await redis.publish(REFRESH_CHANNEL, 'refresh')
+
+
+if __name__ == '__main__':
+    print(f"Refresh sent to {asyncio.run(publish_refresh(redis_client))} processes")
@@ -1,6 +1,18 @@
+from sqlalchemy import select, Result, Row
+
 from src.database.models import OrderType
 from src.database.repository import SQLAlchemyRepository
 
 
 class OrderTypeRepository(SQLAlchemyRepository[OrderType]):
     model = OrderType
+
+    async def get_rows(self) -> list[Row[tuple[int, str]]]:
+        """
+        Reads the id and name of all order types sorted by id.
+
+        Returns:
+            list[Row[tuple[int, str]]]: Rows of the order types, empty if the table is empty.
+        """
+        result: Result = await self.execute(select(self.model.id, self.model.name).order_by(self.model.id))
+        return list(result.all())
@@ -1,12 +1,26 @@
-from enum import Enum
+from typing import Annotated
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import AfterValidator, BaseModel, ConfigDict
 
+from src.models.order_types.registry import order_type_registry
 
-class OrderTypeEnum(str, Enum):
-    CLOTHING = 'Clothing'
-    ELECTRONICS = 'Electronics'
-    MISCELLANEOUS = 'Miscellaneous'
+
+def validate_order_type_name(name: str) -> str:
+    """
+    Checks that an order type with the name exists, without a database query.
+
+    Raises:
+        ValueError: If there is no such order type.
+    """
+    if name not in order_type_registry:
+        names = [f"'{order_type.name}'" for order_type in order_type_registry.all()]
+        expected = ' or '.join(filter(None, [', '.join(names[:-1]), *names[-1:]]))
+        raise ValueError(f"Input should be {expected}")
+    return name
+
+
+# Name of an existing order type
+OrderTypeName = Annotated[str, AfterValidator(validate_order_type_name)]
 
 
 class OrderTypeSchemas(BaseModel):
@@ -0,0 +1,6 @@
+from src.models.order.repository import OrderRepository
+from src.services.pricing import PricingService
+
+
+def pricing_service():
+    return PricingService(OrderRepository)
@@ -0,0 +1,55 @@
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from src.pricing.delivery import WEIGHT_RATE, COST_RATE
+
+# Upper bounds of the delivery cost distribution buckets, in RUB
+DEFAULT_BUCKETS = [100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class TariffWhatIfSchemas(BaseModel):
+    weight_rate: Decimal = Field(
+        WEIGHT_RATE,
+        ge=0,
+        json_schema_extra={"description": "USD per kg of weight", "example": "0.6"}
+    )
+    cost_rate: Decimal = Field(
+        COST_RATE,
+        ge=0,
+        json_schema_extra={"description": "Share of the order cost in USD", "example": "0.01"}
+    )
+    usd_to_rub_rate: Optional[Decimal] = Field(
+        None,
+        gt=0,
+        json_schema_extra={"description": "Exchange rate to evaluate, the current one if omitted", "example": "95.5"}
+    )
+    buckets: list[Decimal] = Field(
+        DEFAULT_BUCKETS,
+        min_length=1,
+        json_schema_extra={"description": "Upper bounds of the distribution buckets, in RUB, ascending"}
+    )
+
+
+class CostBucketSchemas(BaseModel):
+    upper_bound: Optional[Decimal] = Field(
+        json_schema_extra={"description": "Upper bound of the bucket, None for the last one"}
+    )
+    current: int
+    proposed: int
+
+
+class TariffWhatIfResultSchemas(BaseModel):
+    orders: int
+    current_usd_to_rub_rate: Decimal
+    proposed_usd_to_rub_rate: Decimal
+    current_revenue: Decimal
+    proposed_revenue: Decimal
+    revenue_delta: Decimal
+    revenue_delta_percent: Optional[Decimal] = Field(
+        json_schema_extra={"description": "None if the current revenue is zero"}
+    )
+    max_increase: Decimal
+    max_decrease: Decimal
+    distribution: list[CostBucketSchemas]
@@ -1,6 +1,36 @@
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert
+
 from src.database.models import UserSession
 from src.database.repository import SQLAlchemyRepository
 
 
 class UserSessionRepository(SQLAlchemyRepository[UserSession]):
     model = UserSession
+
+    async def create_missing(self, session_ids: list[str]) -> None:
+        """
+        Creates user sessions that do not exist yet, existing ones are left untouched.
+
+        Args:
+            session_ids (list[str]): Session identifiers.
+        """
+        stmt = (
+            insert(self.model)
+            .values([{'session_id': session_id} for session_id in session_ids])
+            .on_conflict_do_nothing(index_elements=[self.model.session_id])
+        )
+        await self.execute(stmt)
+
+    async def exists(self, session_id: str) -> bool:
+        """
+        Checks whether a user session is stored.
+
+        Args:
+            session_id (str): Session identifier.
+
+        Returns:
+            bool: True if the session exists.
+        """
+        result = await self.execute(select(exists().where(self.model.session_id == session_id)))
+        return result.scalar()
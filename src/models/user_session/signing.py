@@ -0,0 +1,79 @@
+import base64
+import hashlib
+import hmac
+import uuid
+from contextvars import ContextVar
+
+from fastapi import Request
+
+from src.config import settings
+
+SESSION_COOKIE = 'session_id'
+
+# Session of the current request accepted from an unsigned cookie issued before cookies were signed
+CTX_LEGACY_SESSION_ID: ContextVar[str | None] = ContextVar('legacy_session_id', default=None)
+
+
+def sign_session_id(session_id: str) -> str:
+    """
+    Builds the session cookie value: the session ID followed by its HMAC-SHA256 signature.
+
+    Args:
+        session_id (str): Session identifier.
+
+    Returns:
+        str: Cookie value in the form "<session_id>.<signature>".
+    """
+    return f"{session_id}.{_signature(session_id)}"
+
+
+def verify_session_cookie(value: str | None) -> str | None:
+    """
+    Checks the signature of a session cookie value.
+
+    Args:
+        value (str | None): Cookie value built by sign_session_id.
+
+    Returns:
+        str | None: Session identifier, or None if the value is missing or its signature does not match.
+    """
+    if not value:
+        return None
+
+    session_id, _, signature = value.rpartition('.')
+    if not session_id or not hmac.compare_digest(signature, _signature(session_id)):
+        return None
+    return session_id
+
+
+def legacy_session_id(value: str | None) -> str | None:
+    """
+    Returns the session identifier of an unsigned cookie value in the format issued before cookies were signed.
+
+    Args:
+        value (str | None): Cookie value.
+
+    Returns:
+        str | None: The value if it is a well-formed UUID without a signature, None otherwise.
+    """
+    if not value or '.' in value:
+        return None
+
+    try:
+        return value if str(uuid.UUID(value)) == value else None
+    except ValueError:
+        return None
+
+
+def read_session_cookie(request: Request) -> str | None:
+    """
+    Returns the verified session identifier from the request cookies, None if there is no valid one.
+
+    A legacy unsigned cookie counts as valid once accept_legacy_session_cookie has found its session.
+    """
+    return verify_session_cookie(request.cookies.get(SESSION_COOKIE)) or CTX_LEGACY_SESSION_ID.get()
+
+
+def _signature(session_id: str) -> str:
+    digest = hmac.new(settings.SESSION_SECRET.encode(), session_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
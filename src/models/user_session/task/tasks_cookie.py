@@ -2,15 +2,22 @@ import uuid
 
 from fastapi import Response, Request
 
-from src.database.transaction import transaction
+from src.database.transaction import session_scope
 from src.models.user_session.repository import UserSessionRepository
-from src.models.user_session.schemas import UserSessionSchemas
+from src.models.user_session.signing import (
+    CTX_LEGACY_SESSION_ID,
+    SESSION_COOKIE,
+    legacy_session_id,
+    read_session_cookie,
+    sign_session_id,
+)
 from src.services.user_session import UserSessionService
 
 
 async def get_or_create_user_session(response: Response, request: Request) -> str:
     """
-    Checks for the presence of a session identifier in cookies. If absent, creates a new session.
+    Checks for the presence of a validly signed session identifier in cookies, or of a legacy one accepted by
+    accept_legacy_session_cookie. If absent, creates a new session.
 
     Args:
         response (Response): FastAPI response object to set cookies.
@@ -20,16 +27,18 @@ async def get_or_create_user_session(response: Response, request: Request) -> st
         str: Session identifier retrieved or newly created.
     """
 
-    cookie_id = request.cookies.get('session_id')
+    cookie_id = read_session_cookie(request)
     if not cookie_id:
-        cookie_id = await create_user_session_and_set_cookie(response)
+        cookie_id = create_user_session_and_set_cookie(response)
     return cookie_id
 
 
-@transaction
-async def create_user_session_and_set_cookie(response: Response) -> str:
+def create_user_session_and_set_cookie(response: Response) -> str:
     """
-    Creates a new user session, stores it in the database, and sets the session ID cookie.
+    Creates a new session identifier and sets it as a signed cookie.
+
+    Nothing is written to the database: the user_sessions row is created together with the first order
+    of the session.
 
     Args:
         response (Response): FastAPI response object to set cookies.
@@ -38,23 +47,43 @@ async def create_user_session_and_set_cookie(response: Response) -> str:
         str: Session identifier created and set as a cookie.
     """
 
-    service = UserSessionService(UserSessionRepository)
-    cookie_id = str(uuid.uuid4())
-    payload = {"session_id": cookie_id}
-
-    cookie = await service.create(payload)
-    cookie = UserSessionSchemas.model_validate(cookie)
-
-    set_session_cookie(response, cookie.session_id)
-    return cookie.session_id
+    session_id = str(uuid.uuid4())
+    set_session_cookie(response, session_id)
+    return session_id
 
 
 def set_session_cookie(response: Response, session_id: str) -> None:
     """
-    Sets the session ID cookie in the response headers.
+    Sets the signed session ID cookie in the response headers.
 
     Args:
         response (Response): FastAPI response object to set cookies.
         session_id (str): Session identifier to set as a cookie.
     """
-    response.set_cookie(key='session_id', value=session_id)
+    response.set_cookie(key=SESSION_COOKIE, value=sign_session_id(session_id))
+
+
+async def accept_legacy_session_cookie(request: Request) -> str | None:
+    """
+    Accepts an unsigned session cookie issued before cookies were signed, if its session is stored.
+
+    The session becomes the session of the current request for read_session_cookie, the caller re-issues the
+    cookie signed. Forged values and sessions that do not exist are left to be rejected as usual.
+
+    Args:
+        request (Request): FastAPI request object to retrieve cookies.
+
+    Returns:
+        str | None: Accepted session identifier, None if the cookie is not a known legacy one.
+    """
+
+    session_id = legacy_session_id(request.cookies.get(SESSION_COOKIE))
+    if session_id is None:
+        return None
+
+    async with session_scope():
+        if not await UserSessionService(UserSessionRepository).exists(session_id):
+            return None
+
+    CTX_LEGACY_SESSION_ID.set(session_id)
+    return session_id
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+from aio_pika.abc import AbstractIncomingMessage
+
+from src.pika.router import decode_message, message_router
+from src.pika.task.create_order import create_orders
+
+
+class MessageBatcher:
+    """
+    Consumer callback that groups incoming order messages.
+
+    Messages are collected until batch_size of them arrive or timeout_ms passes since the first one, then the
+    whole group is stored by one handler call (one transaction, one multi-row INSERT) and acked. If the batch
+    fails, its messages are replayed one by one through message_router, so a single broken message does not
+    take the rest of the batch down with it. A replayed message carrying a list of orders falls back to a
+    transaction per order in turn.
+
+    Usage:
+        batcher = MessageBatcher(batch_size=100, timeout_ms=50)
+        await queue.consume(batcher)
+    """
+
+    def __init__(
+            self,
+            batch_size: int,
+            timeout_ms: int,
+            handler: Callable[[list[dict]], Awaitable] = create_orders
+    ) -> None:
+        self._batch_size = batch_size
+        self._timeout = timeout_ms / 1000
+        self._handler = handler
+        self._messages: list[AbstractIncomingMessage] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def __call__(self, message: AbstractIncomingMessage) -> None:
+        self._messages.append(message)
+
+        if len(self._messages) >= self._batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._timeout, self._flush_on_timeout)
+
+    def _flush_on_timeout(self) -> None:
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        # Keep a reference until the task is done, the loop only holds weak ones
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Stores and acks all collected messages."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Swap before the first await, messages arriving meanwhile start the next batch
+        messages, self._messages = self._messages, []
+        if not messages:
+            return
+
+        try:
+            payloads = []
+            for message in messages:
+                body = decode_message(message)
+                payloads.extend(body if isinstance(body, list) else [body])
+
+            await self._handler(payloads)
+        except Exception as e:
+            logger.error(f"Error in processing a batch of {len(messages)} messages, retrying one by one: {e}")
+            for message in messages:
+                try:
+                    await message_router(message)
+                except Exception:
+                    pass  # message_router has already rejected the message
+            return
+
+        for message in messages:
+            await message.ack()
+
+    async def close(self) -> None:
+        """Flushes the pending batch and waits for the flushes started by the timer."""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable
+
+import msgpack
+import orjson
+
+# msgpack extension type of Decimal values, packed as their exact string form
+DECIMAL_EXT_TYPE = 1
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    Encoding of order message bodies, named by the AMQP content_type of the message.
+
+    Usage:
+        codec = CODECS[settings.RMQ_CODEC]
+        Message(body=codec.encode(payload), content_type=codec.content_type)
+        get_codec(message.content_type).decode(message.body)
+    """
+
+    content_type: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+def _json_default(obj: Any) -> str:
+    # Decimal is sent as a string, as with the json module before, so consumers of either version can read it
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj: Any) -> msgpack.ExtType:
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(DECIMAL_EXT_TYPE, str(obj).encode())
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == DECIMAL_EXT_TYPE:
+        return Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+JSON_CODEC = Codec(
+    content_type='application/json',
+    encode=lambda payload: orjson.dumps(payload, default=_json_default),
+    # orjson reads the body bytes as they are, without decoding them to str first
+    decode=orjson.loads,
+)
+
+# Decimal values keep their precision and come back as Decimal
+MSGPACK_CODEC = Codec(
+    content_type='application/msgpack',
+    encode=lambda payload: msgpack.packb(payload, default=_msgpack_default),
+    decode=lambda body: msgpack.unpackb(body, ext_hook=_msgpack_ext_hook),
+)
+
+CODECS = {
+    'json': JSON_CODEC,
+    'msgpack': MSGPACK_CODEC,
+}
+
+_BY_CONTENT_TYPE = {codec.content_type: codec for codec in CODECS.values()}
+
+
+def get_codec(content_type: str | None) -> Codec:
+    """
+    Returns the codec of a message by its content_type.
+
+    Messages of publishers that did not set content_type, or set an unknown one, are read as JSON.
+    """
+    return _BY_CONTENT_TYPE.get(content_type, JSON_CODEC)
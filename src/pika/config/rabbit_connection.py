@@ -1,29 +1,57 @@
-import json
-from dataclasses import dataclass
-from decimal import Decimal
+import asyncio
+from dataclasses import dataclass, field
 
 from loguru import logger
 from aio_pika import connect_robust, Message
 from aio_pika.abc import AbstractRobustChannel, AbstractRobustConnection
 
 from src.config import settings
+from src.pika.codec import CODECS, Codec
 
 RABBIT_URL = settings.RABBIT_URL
 RMQ_QUEUE = settings.RMQ_QUEUE
 
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        """Convert Decimal objects to strings for JSON serialization."""
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return super().default(obj)
-
-
 @dataclass
 class RabbitConnect:
+    """
+    Publisher of the API, with a small pool of channels on one connection.
+
+    In 'confirm' mode a publish returns once the broker confirms it. The channels are shared round-robin and
+    any number of publishes are in flight on each of them, up to max_outstanding_confirms per process.
+    In 'transaction' mode a publish is committed in an AMQP transaction. Each transaction takes a channel of
+    the pool for itself, so up to pool_size requests publish at once.
+
+    With coalesce enabled, send_message does not publish right away: messages of concurrent callers are collected
+    until coalesce_size of them are waiting or coalesce_timeout_ms passes since the first one, then published as
+    one batch message, which the consumer stores like a batch of POST /create_order_rabbit/batch. Every caller
+    returns once the batch is taken by the broker and gets its error if it is not.
+
+    Bodies are encoded by the codec, its content_type is set on every message.
+    """
+
+    mode: str = settings.RMQ_PUBLISH_MODE
+    pool_size: int = settings.RMQ_CHANNEL_POOL_SIZE
+    max_outstanding_confirms: int = settings.RMQ_MAX_OUTSTANDING_CONFIRMS
+    coalesce: bool = settings.RMQ_COALESCE_ENABLED
+    coalesce_size: int = settings.RMQ_COALESCE_SIZE
+    coalesce_timeout_ms: int = settings.RMQ_COALESCE_TIMEOUT_MS
+    codec: Codec = CODECS[settings.RMQ_CODEC]
     connection: AbstractRobustConnection | None = None
-    channel: AbstractRobustChannel | None = None
+    channels: list[AbstractRobustChannel] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.mode not in ('confirm', 'transaction'):
+            raise ValueError(f"Unknown publish mode: {self.mode}")
+
+        self._next_channel = 0
+        self._idle_channels: asyncio.Queue[AbstractRobustChannel] = asyncio.Queue()
+        self._confirms = asyncio.Semaphore(self.max_outstanding_confirms)
+
+        # routing key -> messages waiting to be coalesced and the futures of their callers
+        self._pending: dict[str, list[tuple[list[dict], asyncio.Future]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._flushes: set[asyncio.Task] = set()
 
     def status(self) -> bool:
         """
@@ -31,18 +59,20 @@ class RabbitConnect:
 
         :return: True if connection established
         """
-        if self.connection.is_closed or self.channel.is_closed:
+        if self.connection is None or self.connection.is_closed:
             return False
-        return True
+        return bool(self.channels) and not any(channel.is_closed for channel in self.channels)
 
     async def _clear(self) -> None:
-        if not self.channel.is_closed:
-            await self.channel.close()
-        if not self.connection.is_closed:
+        for channel in self.channels:
+            if not channel.is_closed:
+                await channel.close()
+        if self.connection is not None and not self.connection.is_closed:
             await self.connection.close()
 
         self.connection = None
-        self.channel = None
+        self.channels = []
+        self._idle_channels = asyncio.Queue()
 
     async def connect(self) -> None:
         """
@@ -53,18 +83,26 @@ class RabbitConnect:
         logger.info('Connecting to the RabbitMQ...')
         try:
             self.connection = await connect_robust(RABBIT_URL)
-            self.channel = await self.connection.channel(publisher_confirms=False)
-            logger.info('Connected to RabbitMQ...')
+            for _ in range(self.pool_size):
+                # Transactions cannot be used on a channel in confirm mode
+                channel = await self.connection.channel(publisher_confirms=self.mode == 'confirm')
+                self.channels.append(channel)
+                self._idle_channels.put_nowait(channel)
+            logger.info(f'Connected to RabbitMQ, {self.pool_size} channels in {self.mode} mode...')
         except Exception as e:
             await self._clear()
             logger.error(e.__dict__)
 
     async def disconnect(self) -> None:
         """
-        Disconnect and clear connections from RabbitMQ
+        Disconnect and clear connections from RabbitMQ, after publishing the coalesced messages
 
         :return: None
         """
+        for routing_key in list(self._pending):
+            self._flush(routing_key)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
         await self._clear()
 
     async def send_message(self, messages: list | dict, routing_key: str = RMQ_QUEUE) -> None:
@@ -74,20 +112,102 @@ class RabbitConnect:
         :param messages: list or dict with messages objects.
         :param routing_key: Routing key of RabbitMQ, not required. Tip: the same as in the consumer.
         """
-        if not self.channel:
-            raise RuntimeError('The message could not be sent because the connection with RabbitMQ is not established')
-
         if isinstance(messages, dict):
             messages = [messages]
 
-        async with self.channel.transaction():
-            for message in messages:
-                message = Message(
-                    body=json.dumps(message, cls=DecimalEncoder).encode()
-                )
-                await self.channel.default_exchange.publish(
-                    message, routing_key=routing_key,
-                )
+        if self.coalesce:
+            await self._send_coalesced(messages, routing_key)
+            return
+
+        await self._publish([self.codec.encode(message) for message in messages], routing_key)
+
+    async def send_batch(self, messages: list[dict], routing_key: str = RMQ_QUEUE) -> None:
+        """
+        Public a list of messages to the RabbitMQ queue as a single message, so the consumer handles them together.
+
+        :param messages: list with messages objects.
+        :param routing_key: Routing key of RabbitMQ, not required. Tip: the same as in the consumer.
+        """
+        await self._publish([self.codec.encode(messages)], routing_key)
+
+    async def _send_coalesced(self, messages: list[dict], routing_key: str) -> None:
+        """
+        Adds messages to the pending batch of the routing key and waits until the batch is published.
+        """
+        if not self.channels:
+            raise RuntimeError('The message could not be sent because the connection with RabbitMQ is not established')
+
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(routing_key, [])
+        pending.append((messages, future))
+
+        if sum(len(pending_messages) for pending_messages, _ in pending) >= self.coalesce_size:
+            self._flush(routing_key)
+        elif routing_key not in self._timers:
+            self._timers[routing_key] = asyncio.get_running_loop().call_later(
+                self.coalesce_timeout_ms / 1000, self._flush, routing_key
+            )
+
+        await future
+
+    def _flush(self, routing_key: str) -> None:
+        if (timer := self._timers.pop(routing_key, None)) is not None:
+            timer.cancel()
+
+        # Taken before the publish starts, messages arriving meanwhile start the next batch
+        pending = self._pending.pop(routing_key, [])
+        if not pending:
+            return
+
+        task = asyncio.create_task(self._publish_pending(pending, routing_key))
+        # Keep a reference until the task is done, the loop only holds weak ones
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _publish_pending(self, pending: list[tuple[list[dict], asyncio.Future]], routing_key: str) -> None:
+        messages = [message for pending_messages, _ in pending for message in pending_messages]
+        try:
+            await self._publish([self.codec.encode(messages)], routing_key)
+        except Exception as e:
+            logger.error(f"Error in publishing {len(messages)} coalesced messages: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for _, future in pending:
+            # A caller may have been cancelled meanwhile, its messages are published anyway
+            if not future.done():
+                future.set_result(None)
+
+    async def _publish(self, bodies: list[bytes], routing_key: str) -> None:
+        """
+        Publishes message bodies, returns once the broker has taken all of them.
+        """
+        if not self.channels:
+            raise RuntimeError('The message could not be sent because the connection with RabbitMQ is not established')
+
+        if self.mode == 'confirm':
+            await asyncio.gather(*(self._publish_confirmed(body, routing_key) for body in bodies))
+            return
+
+        channel = await self._idle_channels.get()
+        try:
+            async with channel.transaction():
+                for body in bodies:
+                    await channel.default_exchange.publish(self._message(body), routing_key=routing_key)
+        finally:
+            self._idle_channels.put_nowait(channel)
+
+    def _message(self, body: bytes) -> Message:
+        return Message(body=body, content_type=self.codec.content_type)
+
+    async def _publish_confirmed(self, body: bytes, routing_key: str) -> None:
+        async with self._confirms:
+            channel = self.channels[self._next_channel % len(self.channels)]
+            self._next_channel += 1
+            # Waits for the confirm of this message only, other publishes on the channel go on meanwhile
+            await channel.default_exchange.publish(self._message(body), routing_key=routing_key)
 
 
 rabbit_connection = RabbitConnect()
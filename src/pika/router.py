@@ -1,14 +1,51 @@
-import json
-
 from aio_pika.abc import AbstractIncomingMessage
+from loguru import logger
+
+from src.pika.codec import get_codec
+from src.pika.task.create_order import create_order, create_orders
+
 
-from src.pika.task.create_order import create_order
+def decode_message(message: AbstractIncomingMessage) -> dict | list[dict]:
+    """
+    Decodes the body of an order message: a single order or a batch of orders.
+
+    The codec is chosen by the content_type of the message, messages without one are JSON.
+    """
+    return get_codec(message.content_type).decode(message.body)
 
 
 async def message_router(message: AbstractIncomingMessage) -> None:
     async with message.process():
-        body = json.loads(message.body.decode())
+        body = decode_message(message)
+        if isinstance(body, list):
+            return await create_orders_one_by_one_on_error(body)
         return await create_order(body)
 
 
+async def create_orders_one_by_one_on_error(messages: list[dict]) -> None:
+    """
+    Stores a batch of orders in one transaction, falling back to a transaction per order if the batch fails.
+
+    A coalesced message carries orders of unrelated requests, so one broken order must not take the others down.
+
+    Args:
+        messages (list[dict]): Dictionaries containing order details.
+
+    Raises:
+        RuntimeError: If some of the orders could not be stored, the message is rejected after the rest are stored.
+    """
+
+    try:
+        return await create_orders(messages)
+    except Exception as e:
+        logger.error(f"Error in storing a batch of {len(messages)} orders, storing them one by one: {e}")
+
+    failed = []
+    for message in messages:
+        try:
+            await create_order(message)
+        except Exception:
+            failed.append(message.get('background_task_id'))
 
+    if failed:
+        raise RuntimeError(f"Orders of tasks {failed} are not stored")
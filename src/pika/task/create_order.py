@@ -1,13 +1,42 @@
-import httpx
+from decimal import Decimal
 
 from loguru import logger
-from fastapi_cache.decorator import cache
 
+from src.database.transaction import transaction
+from src.pricing.delivery import resolve_delivery_cost
 from src.services.order import OrderService
+from src.services.user_session import UserSessionService
 from src.models.order.repository import OrderRepository
+from src.models.order.status import order_status_store
+from src.models.user_session.repository import UserSessionRepository
 
 
 async def create_order(message: dict) -> None:
+    """
+    Stores an order from the queue and records its status once it is committed.
+
+    Args:
+        message (dict): Dictionary containing order details.
+    """
+
+    if stored := await store_order(message):
+        await order_status_store.stored(stored)
+
+
+async def create_orders(messages: list[dict]) -> None:
+    """
+    Stores a batch of orders from the queue and records their statuses once they are committed.
+
+    Args:
+        messages (list[dict]): Dictionaries containing order details.
+    """
+
+    if stored := await store_orders(messages):
+        await order_status_store.stored(stored)
+
+
+@transaction
+async def store_order(message: dict) -> list[tuple[str, str, Decimal | None]]:
     """
     Asynchronously processes the creation of an order and calculates the delivery cost.
 
@@ -15,53 +44,55 @@ async def create_order(message: dict) -> None:
         message (dict): Dictionary containing order details.
 
     Returns:
-        dict: Dictionary indicating the success of the task.
+        list[tuple[str, str, Decimal | None]]: Background task id, identifier and delivery cost of the order.
 
     Raises:
         RuntimeError: If there is an error during order creation or delivery cost calculation.
 
     Note:
-        This function creates an order using the OrderService, calculates the delivery cost based on the item's weight
-        and cost, updates the order with the calculated delivery cost, and returns a success message.
+        The delivery cost is calculated before the order is stored, so the order is written with a single INSERT.
+        If the exchange rate is unavailable the order is stored without the cost and priced later.
+        The user session is stored together with its first order.
     """
 
     try:
+        delivery_cost = await resolve_delivery_cost(message)
+        await UserSessionService(UserSessionRepository).ensure_exist([message['session_uuid']])
         service = OrderService(OrderRepository)
-        order = await service.create_order(message)
-        delivery_cost = await get_delivery_cost(float(message['weight']), float(message['cost']))
-        await service.update_order({'delivery_cost': delivery_cost}, order.id)
-        return logger.info(f"Order created: task[{order.id}]")
+        order_id = await service.create_order({**message, 'delivery_cost': delivery_cost})
+        logger.info(f"Order created: task[{order_id}]")
+        return [(message['background_task_id'], order_id, delivery_cost)]
     except Exception as e:
         logger.error(f"Error in processing order creation: {e.__dict__}")
         raise e
 
 
-@cache(expire=300)
-async def get_price_usd() -> float:
-    """
-    Retrieves the current USD to RUB exchange rate from an external API.
+@transaction
+async def store_orders(messages: list[dict]) -> list[tuple[str, str, Decimal | None]]:
     """
+    Asynchronously processes a batch of orders: calculates their delivery costs and stores them with one INSERT.
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get('https://www.cbr-xml-daily.ru/daily_json.js')
-        data = response.json()
-        usd_to_rub_rate = data['Valute']['USD']['Value']
-        return usd_to_rub_rate
-    except Exception as e:
-        logger.error(f"Error when receiving the USD exchange rate: {e.__dict__}")
-        raise e
+    Args:
+        messages (list[dict]): Dictionaries containing order details.
 
+    Returns:
+        list[tuple[str, str, Decimal | None]]: Background task id, identifier and delivery cost of each order.
 
-async def get_delivery_cost(weight: float, cost: float) -> str:
-    """
-    Calculates the delivery cost for an order based on its weight and cost, using the current USD to RUB exchange rate.
+    Raises:
+        HTTPException: If there is a database error (status code 500).
     """
 
     try:
-        usd_to_rub_rate = await get_price_usd()
-        delivery_cost = str(round((weight * 0.5 + cost * 0.01) * usd_to_rub_rate, 2))
-        return delivery_cost
+        payloads = [{**message, 'delivery_cost': await resolve_delivery_cost(message)} for message in messages]
+        await UserSessionService(UserSessionRepository).ensure_exist([message['session_uuid'] for message in messages])
+
+        service = OrderService(OrderRepository)
+        order_ids = await service.create_orders(payloads)
+        logger.info(f"Orders created: {len(order_ids)} tasks")
+        return [
+            (payload['background_task_id'], order_id, payload['delivery_cost'])
+            for payload, order_id in zip(payloads, order_ids)
+        ]
     except Exception as e:
-        logger.error(f"Error in calculating the shipping cost: {e.__dict__}")
+        logger.error(f"Error in processing batch order creation: {e.__dict__}")
         raise e
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+from loguru import logger
+
+from src.pricing.exchange_rate import get_price_usd
+
+# Delivery cost = (weight in kg * WEIGHT_RATE + cost in USD * COST_RATE) * USD to RUB rate
+WEIGHT_RATE = Decimal('0.5')
+COST_RATE = Decimal('0.01')
+
+
+@dataclass(frozen=True)
+class Tariff:
+    """Coefficients of the delivery cost formula."""
+
+    weight_rate: Decimal = WEIGHT_RATE
+    cost_rate: Decimal = COST_RATE
+
+
+DEFAULT_TARIFF = Tariff()
+
+
+def calculate_delivery_cost(
+        weight: Decimal,
+        cost: Decimal,
+        usd_to_rub_rate: Decimal,
+        tariff: Tariff = DEFAULT_TARIFF
+) -> Decimal:
+    """
+    Calculates the delivery cost of one order in RUB, rounded to kopecks.
+    """
+
+    return ((weight * tariff.weight_rate + cost * tariff.cost_rate) * usd_to_rub_rate).quantize(Decimal('0.01'))
+
+
+def calculate_delivery_costs(
+        weights: np.ndarray,
+        costs: np.ndarray,
+        usd_to_rub_rate: float,
+        tariff: Tariff = DEFAULT_TARIFF
+) -> np.ndarray:
+    """
+    Calculates delivery costs of many orders at once in RUB, rounded to kopecks.
+
+    Works in float64, so results may differ from calculate_delivery_cost by a kopeck on rounding boundaries.
+    Meant for estimates over whole tables, stored costs are calculated with calculate_delivery_cost.
+
+    Args:
+        weights (np.ndarray): Weights of the orders in kg.
+        costs (np.ndarray): Costs of the orders in USD.
+        usd_to_rub_rate (float): USD to RUB exchange rate.
+        tariff (Tariff): Coefficients of the formula.
+
+    Returns:
+        np.ndarray: Delivery costs of the orders.
+    """
+
+    return np.round((weights * float(tariff.weight_rate) + costs * float(tariff.cost_rate)) * usd_to_rub_rate, 2)
+
+
+async def get_delivery_cost(weight: Decimal, cost: Decimal) -> Decimal:
+    """
+    Calculates the delivery cost for an order based on its weight and cost, using the current USD to RUB exchange rate.
+    """
+
+    try:
+        usd_to_rub_rate = Decimal(str(await get_price_usd()))
+        return calculate_delivery_cost(weight, cost, usd_to_rub_rate)
+    except Exception as e:
+        logger.error(f"Error in calculating the shipping cost: {e}")
+        raise
+
+
+async def resolve_delivery_cost(order: dict) -> Decimal | None:
+    """
+    Calculates the delivery cost of an order before it is stored.
+
+    Args:
+        order (dict): Dictionary containing order details.
+
+    Returns:
+        Decimal | None: Delivery cost, or None if the exchange rate is unavailable.
+    """
+
+    try:
+        return await get_delivery_cost(Decimal(str(order['weight'])), Decimal(str(order['cost'])))
+    except Exception:
+        logger.warning(f"Delivery cost is not calculated for task[{order.get('background_task_id')}]")
+        return None
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from loguru import logger
+from fastapi_cache.decorator import cache
+
+from src.config import settings
+from src.metrics import metrics
+
+
+class RateCache:
+    """
+    Per-process cache of the USD to RUB exchange rate.
+
+    A fresh value is served from memory. Once the value gets within refresh_ahead seconds of its expiry, or expires,
+    a single background refresh is started and everybody keeps getting the last good value until it finishes.
+    A value is served at most max_stale seconds past its expiry: after that, or when there is no value at all,
+    coroutines wait for the refresh, share one fetch and get its error if it fails, so orders are not priced
+    with an arbitrarily old rate.
+
+    Usage:
+        rate_cache = RateCache(fetch_price_usd, ttl=300, refresh_ahead=30, max_stale=600)
+        rate = await rate_cache.get()
+    """
+
+    def __init__(
+            self,
+            fetch: Callable[[], Awaitable[float]],
+            ttl: float,
+            refresh_ahead: float,
+            max_stale: float
+    ) -> None:
+        self._fetch = fetch
+        self._ttl = ttl
+        self._refresh_ahead = refresh_ahead
+        self._max_stale = max_stale
+        self._value: float | None = None
+        self._expires_at: float = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get(self) -> float:
+        """
+        Returns the cached exchange rate, fetching it if the process has none yet or it is too old to be served.
+
+        Raises:
+            Exception: If there is no usable cached value and the fetch fails.
+        """
+        now = time.monotonic()
+        if self._value is None or now >= self._expires_at + self._max_stale:
+            metrics.inc('fx_rate.miss')
+            return await asyncio.shield(self._refresh())
+
+        metrics.inc('fx_rate.hit')
+        if now >= self._expires_at - self._refresh_ahead:
+            self._refresh()
+        return self._value
+
+    def stats(self) -> dict:
+        """Returns hit, miss and refresh counters of the process."""
+        return {
+            name: metrics.counter(f'fx_rate.{name}')
+            for name in ('hit', 'miss', 'refresh', 'refresh_error')
+        }
+
+    def clear(self) -> None:
+        """Forgets the cached value."""
+        self._value = None
+        self._expires_at = 0.0
+
+    def _refresh(self) -> asyncio.Task:
+        # Single flight: a running refresh is shared by everybody who needs one
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._do_refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    async def _do_refresh(self) -> float:
+        metrics.inc('fx_rate.refresh')
+        value = await self._fetch()
+        self._value = value
+        self._expires_at = time.monotonic() + self._ttl
+        return value
+
+    def _log_refresh_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and (error := task.exception()) is not None:
+            metrics.inc('fx_rate.refresh_error')
+            if self._value is not None and time.monotonic() < self._expires_at + self._max_stale:
+                logger.error(f"Error when refreshing the USD exchange rate, keeping the last value: {error}")
+            else:
+                logger.error(f"Error when refreshing the USD exchange rate, no usable value to serve: {error}")
+
+
+class ExchangeRateClient:
+    """
+    Long-lived HTTP client of the exchange rate provider.
+
+    Connections are kept alive between requests, so only the first request of a process pays for DNS, TCP and
+    TLS setup. The client is opened and closed by the API lifespan, the consumer and the Celery worker; a process
+    that did not open it gets one on the first request.
+    """
+
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        """Opens the connection pool."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.FX_RATE_BASE_URL,
+                timeout=httpx.Timeout(settings.FX_READ_TIMEOUT, connect=settings.FX_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.FX_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.FX_MAX_CONNECTIONS
+                ),
+            )
+
+    async def close(self) -> None:
+        """Closes the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_usd_rate(self) -> float:
+        """
+        Requests the current USD to RUB exchange rate.
+
+        Raises:
+            httpx.HTTPError: If the request fails, times out or the provider answers with an error status.
+        """
+        await self.start()
+        response = await self._client.get(settings.FX_RATE_PATH)
+        response.raise_for_status()
+        return response.json()['Valute']['USD']['Value']
+
+
+fx_client = ExchangeRateClient()
+
+
+@cache(expire=300)
+async def fetch_price_usd() -> float:
+    """
+    Retrieves the current USD to RUB exchange rate from an external API.
+    """
+
+    try:
+        return await fx_client.get_usd_rate()
+    except Exception as e:
+        logger.error(f"Error when receiving the USD exchange rate: {e}")
+        raise
+
+
+rate_cache = RateCache(
+    fetch_price_usd,
+    ttl=settings.FX_RATE_TTL,
+    refresh_ahead=settings.FX_RATE_REFRESH_AHEAD,
+    max_stale=settings.FX_RATE_MAX_STALE
+)
+
+
+async def get_price_usd() -> float:
+    """
+    Returns the USD to RUB exchange rate from the in-process cache, backed by Redis and the external API.
+    """
+
+    return await rate_cache.get()
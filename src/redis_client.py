@@ -0,0 +1,6 @@
+from redis import asyncio as aioredis
+
+from src.config import settings
+
+# Shared by the application code of a process, connections are opened on first use
+redis_client = aioredis.from_url(settings.REDIS_URL)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, status
+
+from src.metrics import metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get('', status_code=status.HTTP_200_OK)
+async def get_metrics() -> dict:
+    """
+    Endpoint to retrieve counters and timings of the worker process that serves the request.
+
+    Returns:
+        dict: Process id, counters and timings (count, average and maximum in seconds).
+    """
+
+    return metrics.snapshot()
@@ -1,19 +1,30 @@
+import uuid
 from typing import List, Annotated
 
-from fastapi import APIRouter, Depends, Request, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi_cache.decorator import cache
 
-from src.celery_app import create_order_task
+from src.cache.keys import ORDER_NAMESPACE
+from src.config import settings
+from src.celery_app import create_order_task, reprice_orders_task
 from src.services.order import OrderService
 from src.models.user_session.task.tasks_cookie import get_or_create_user_session
 from src.models.order.dependencies import order_service
 from src.models.order.schemas import (
     CreateOrderSchemas,
     OrderSchemas,
-    OrderIdSchemas
+    OrderIdSchemas,
+    OrderStatusSchemas,
+    OrderSortEnum,
+    ExportFormatEnum,
+    dump_order_row
 )
-from src.models.order_types.schemas import OrderTypeEnum
-from src.database.transaction import transaction
+from src.models.order.export import MEDIA_TYPES, stream_export
+from src.models.order.status import order_status_notifier, order_status_store
+from src.models.order_types.schemas import OrderTypeName
+from src.database.replicas import mark_recent_write, read_preference, read_primary
+from src.database.transaction import transaction, read_only_transaction
 
 router = APIRouter(prefix="/order", tags=["Order"])
 
@@ -23,6 +34,7 @@ router = APIRouter(prefix="/order", tags=["Order"])
 async def create_order(
         # order: Annotated[CreateOrderSchemas, Depends()],
         order: CreateOrderSchemas,
+        response: Response,
         cookie_id=Depends(get_or_create_user_session)
 ) -> OrderIdSchemas:
     """
@@ -30,32 +42,66 @@ async def create_order(
 
     Args:
         order (CreateOrderSchema): Data schema for creating an order.
+        response (Response): FastAPI Response object, receives the cookie routing the next reads to the primary.
         cookie_id (str): User session ID stored in a cookie, or a new session ID if absent.
 
     Returns:
         OrderIdSchema: ID of the created order.
     """
 
+    # The status is recorded before the task is sent, so the worker cannot overwrite it with queued
+    task_id = str(uuid.uuid4())
+    await order_status_store.queued([task_id])
+
     # регистрация посылок с использованием Celery and RabbitMQ
-    order = create_order_task.delay(order.model_dump(), cookie_id)
+    order = create_order_task.apply_async((order.model_dump(), cookie_id), task_id=task_id)
+    mark_recent_write(response)
     return OrderIdSchemas(id=order.id)
 
 
-@router.get('/get_user_orders_list', response_model=list[OrderSchemas], status_code=status.HTTP_200_OK)
-@transaction
+@router.post('/reprice', status_code=status.HTTP_202_ACCEPTED)
+async def reprice_orders() -> OrderIdSchemas:
+    """
+    Endpoint to start the repricing of orders without a delivery cost outside the schedule.
+
+    Returns:
+        OrderIdSchema: ID of the background task.
+    """
+
+    task = reprice_orders_task.delay()
+    return OrderIdSchemas(id=task.id)
+
+
+@router.get(
+    '/get_user_orders_list',
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={status.HTTP_200_OK: {'model': list[OrderSchemas]}},
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(read_preference)]
+)
+@read_only_transaction
 async def get_orders_user_list(
         request: Request,
         service: Annotated[OrderService, Depends(order_service)],
         order_type: Annotated[
-            OrderTypeEnum | None,
-            Query(description='Type of the order: Clothing, Electronics, Miscellaneous')
+            OrderTypeName | None,
+            Query(description='Type of the order, one of GET /type/order_type_list')
         ] = None,
         delivery_cost: Annotated[
             bool | None,
             Query(description='Whether the cost is calculated or not')
         ] = None,
-        page: int = 1,
-        page_size: int = 10,
+        page: Annotated[int, Query(ge=1)] = 1,
+        page_size: Annotated[int, Query(ge=1)] = 10,
+        sort_by: Annotated[
+            OrderSortEnum,
+            Query(description='Sort key: id, cost, delivery_cost, created_at')
+        ] = OrderSortEnum.ID,
+        cursor: Annotated[
+            str | None,
+            Query(description='Value of the X-Next-Cursor header of the previous page, replaces page')
+        ] = None,
 ):
     """
     Endpoint to retrieve all orders for a user, with optional filters by order type and delivery cost.
@@ -63,25 +109,139 @@ async def get_orders_user_list(
     Args:
         request (Request): FastAPI Request object.
         service (OrderService): Service dependency for retrieving user orders.
-        order_type (OrderTypeEnum, optional): Optional filter for order type.
+        order_type (str, optional): Optional filter for order type, one of order_type_registry.
         delivery_cost (bool, optional): Optional filter for delivery cost presence.
         page (int, optional): Page number for pagination.
         page_size (int, optional): Number of orders per page.
+        sort_by (OrderSortEnum, optional): Sort key of the list.
+        cursor (str, optional): Cursor of the next page for keyset pagination.
 
     Returns:
-        List[OrderSchema]: List of user orders filtered by the specified parameters.
+        ORJSONResponse: List of user orders filtered by the specified parameters, in the format of OrderSchema.
+        The cursor of the next page is returned in the X-Next-Cursor header, the number of orders on all pages
+        in X-Total-Count and whether there is a next page in X-Has-Next.
+        The rows are serialized directly, without building OrderSchema models.
 
     Raises:
         HTTPException: If no orders are found (status code 404).
     """
 
-    orders = await service.get_orders_for_user(request, order_type, delivery_cost, page, page_size)
-    return orders
+    orders = await service.get_orders_for_user(request, order_type, delivery_cost, page, page_size, sort_by, cursor)
+    headers = {'X-Total-Count': str(orders.total), 'X-Has-Next': str(orders.next_cursor is not None).lower()}
+    if orders.next_cursor is not None:
+        headers['X-Next-Cursor'] = orders.next_cursor
+    return ORJSONResponse([dump_order_row(order) for order in orders.items], headers=headers)
 
 
-@router.get('/{order_id}', response_model=OrderSchemas, status_code=status.HTTP_200_OK)
-@cache(expire=120)
-@transaction
+@router.get('/export', response_class=StreamingResponse, dependencies=[Depends(read_preference)])
+async def export_user_orders(
+        request: Request,
+        service: Annotated[OrderService, Depends(order_service)],
+        export_format: Annotated[
+            ExportFormatEnum,
+            Query(alias='format', description='Format of the export: ndjson, csv')
+        ] = ExportFormatEnum.NDJSON,
+        order_type: Annotated[
+            OrderTypeName | None,
+            Query(description='Type of the order, one of GET /type/order_type_list')
+        ] = None,
+        delivery_cost: Annotated[
+            bool | None,
+            Query(description='Whether the cost is calculated or not')
+        ] = None,
+) -> StreamingResponse:
+    """
+    Endpoint to download all orders of a user as NDJSON or CSV, with the filters of get_user_orders_list.
+
+    Orders are read through a server-side cursor EXPORT_CHUNK_SIZE rows at a time and sent as soon as they are
+    read, so memory use does not depend on the number of orders and the download starts right away.
+
+    Args:
+        request (Request): FastAPI Request object.
+        service (OrderService): Service dependency for retrieving user orders.
+        export_format (ExportFormatEnum, optional): Format of the export.
+        order_type (str, optional): Optional filter for order type, one of order_type_registry.
+        delivery_cost (bool, optional): Optional filter for delivery cost presence.
+
+    Returns:
+        StreamingResponse: Orders in id order, in the format of OrderSchema.
+
+    Raises:
+        HTTPException: If the user has no session (status code 401).
+    """
+
+    chunks = service.export_orders_for_user(request, order_type, delivery_cost, settings.EXPORT_CHUNK_SIZE)
+    return StreamingResponse(
+        stream_export(chunks, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="orders.{export_format.value}"'},
+    )
+
+
+@router.get('/status/{task_id}', status_code=status.HTTP_200_OK)
+async def get_order_status(task_id: str) -> OrderStatusSchemas:
+    """
+    Endpoint to poll the progress of an order registered in the background, answered from Redis only.
+
+    Args:
+        task_id (str): Background task id returned by the create endpoints.
+
+    Returns:
+        OrderStatusSchemas: queued, persisted or priced, with the order id once persisted and the delivery cost
+        once priced.
+
+    Raises:
+        HTTPException: If the status is unknown or expired (status code 404), GET /order/{task_id} still finds
+        stored orders.
+    """
+
+    order_status = await order_status_store.get(task_id)
+    if order_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not found')
+    return OrderStatusSchemas.model_validate(order_status)
+
+
+@router.get('/status/{task_id}/wait', status_code=status.HTTP_200_OK)
+async def wait_order_priced(
+        task_id: str,
+        timeout: Annotated[
+            float,
+            Query(gt=0, le=settings.ORDER_WAIT_MAX_TIMEOUT, description='Seconds to wait for the delivery cost')
+        ] = settings.ORDER_WAIT_TIMEOUT,
+) -> OrderStatusSchemas:
+    """
+    Long-poll endpoint holding the request until the order of a task is priced, instead of polling GET /order/{id}.
+
+    Returns as soon as the consumer, the Celery worker or the repricing reports the delivery cost, or with the
+    latest status after timeout seconds, then the client asks again. Answered from Redis only.
+
+    Args:
+        task_id (str): Background task id returned by the create endpoints.
+        timeout (float, optional): Maximum number of seconds to hold the request.
+
+    Returns:
+        OrderStatusSchemas: priced with the delivery cost, or queued/persisted on timeout.
+
+    Raises:
+        HTTPException: If the status is unknown or expired (status code 404).
+    """
+
+    order_status = await order_status_notifier.wait_priced(task_id, timeout)
+    if order_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not found')
+    return OrderStatusSchemas.model_validate(order_status)
+
+
+@router.get(
+    '/{order_id}',
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={status.HTTP_200_OK: {'model': OrderSchemas}},
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(read_primary)]
+)
+@cache(expire=settings.ORDER_CACHE_TTL, namespace=ORDER_NAMESPACE)
+@read_only_transaction
 async def get_order_by_id(
         order_id: Annotated[OrderIdSchemas, Depends()],
         service: Annotated[OrderService, Depends(order_service)]
@@ -89,16 +249,19 @@ async def get_order_by_id(
     """
     Endpoint to retrieve an order by its ID.
 
+    Responses are cached until the order changes. Cache misses read the primary, so an entry dropped after a
+    change is not filled again from a replica that has not received the change yet.
+
     Args:
         order_id (str): ID of the order to retrieve.
         service (OrderService): Service dependency for retrieving orders.
 
     Returns:
-        OrderSchema: Schema of the retrieved order.
+        dict: The retrieved order in the format of OrderSchema.
 
     Raises:
         HTTPException: If the specified order is not found (status code 404).
     """
 
     order = await service.get_order(order_id.id)
-    return order
+    return dump_order_row(order)
@@ -1,11 +1,15 @@
 import json
 import uuid
 from decimal import Decimal
+from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Response
 from loguru import logger
 
+from src.config import settings
+from src.database.replicas import mark_recent_write
 from src.models.order.schemas import CreateOrderSchemas, OrderIdSchemas
+from src.models.order.status import order_status_store
 from src.models.user_session.task.tasks_cookie import get_or_create_user_session
 from src.pika.config.rabbit_connection import rabbit_connection
 
@@ -15,12 +19,14 @@ router = APIRouter(prefix="/create_order_rabbit", tags=["RabbitMQ"])
 @router.post("/")
 async def create_order_rabbit(
         order: CreateOrderSchemas,
+        response: Response,
         cookie_id=Depends(get_or_create_user_session)
 ) -> OrderIdSchemas:
     """
     Endpoint to create a new order by using RabbitMQ.
     Args:
         order (CreateOrderSchema): Data schema for creating an order.
+        response (Response): FastAPI Response object, receives the cookie routing the next reads to the primary.
         cookie_id (str): User session ID stored in a cookie, or a new session ID if absent.
 
     Returns:
@@ -34,7 +40,48 @@ async def create_order_rabbit(
         'session_uuid': cookie_id
     })
 
+    await order_status_store.queued([task_id])
     await rabbit_connection.send_message(
         messages=payload
     )
+    mark_recent_write(response)
     return OrderIdSchemas(id=task_id)
+
+
+@router.post("/batch")
+async def create_orders_rabbit(
+        orders: Annotated[
+            list[CreateOrderSchemas],
+            Body(min_length=1, max_length=settings.ORDER_BATCH_MAX_SIZE)
+        ],
+        response: Response,
+        cookie_id=Depends(get_or_create_user_session)
+) -> list[OrderIdSchemas]:
+    """
+    Endpoint to create several orders by using RabbitMQ.
+
+    The whole list is published as one message and stored by the consumer with a single multi-row INSERT.
+
+    Args:
+        orders (list[CreateOrderSchema]): Data schemas for creating the orders.
+        response (Response): FastAPI Response object, receives the cookie routing the next reads to the primary.
+        cookie_id (str): User session ID stored in a cookie, or a new session ID if absent.
+
+    Returns:
+        list[OrderIdSchema]: IDs of the created orders, in the order of the request.
+    """
+    payloads = []
+    for order in orders:
+        payload = order.model_dump()
+        payload.update({
+            'background_task_id': str(uuid.uuid4()),
+            'session_uuid': cookie_id
+        })
+        payloads.append(payload)
+
+    await order_status_store.queued(payload['background_task_id'] for payload in payloads)
+    await rabbit_connection.send_batch(
+        messages=payloads
+    )
+    mark_recent_write(response)
+    return [OrderIdSchemas(id=payload['background_task_id']) for payload in payloads]
@@ -1,26 +1,18 @@
-from typing import List, Annotated
-from fastapi import APIRouter, Depends, status
-from fastapi_cache.decorator import cache
+from typing import List
+from fastapi import APIRouter, HTTPException, status
 
-from src.services.order_types import OrderTypesService
-from src.models.order_types.dependencies import order_type_service
+from src.models.order_types.registry import order_type_registry
 from src.models.order_types.schemas import OrderTypeSchemas
-from src.database.transaction import transaction
 
 router = APIRouter(prefix="/type", tags=["Type"])
 
 
 @router.get('/order_type_list', response_model=List[OrderTypeSchemas], status_code=status.HTTP_200_OK)
-@cache(expire=None)
-@transaction
-async def get_types_order_list(
-        service: Annotated[OrderTypesService, Depends(order_type_service)]
-):
+async def get_types_order_list():
     """
     Endpoint to retrieve all available order types.
 
-    Args:
-        service (OrderTypesService): Service dependency for retrieving order types.
+    The types are served from the in-process registry, the database is read only at startup and on refresh.
 
     Returns:
         List[OrderTypeSchema]: List of order type schemas.
@@ -29,5 +21,7 @@ async def get_types_order_list(
         HTTPException: If no order types are found (status code 404).
     """
 
-    order_types = await service.get_order_types()
+    order_types = order_type_registry.all()
+    if not order_types:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not found')
     return order_types
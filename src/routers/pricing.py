@@ -0,0 +1,32 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+
+from src.services.pricing import PricingService
+from src.models.pricing.dependencies import pricing_service
+from src.models.pricing.schemas import TariffWhatIfSchemas, TariffWhatIfResultSchemas
+from src.database.transaction import transaction
+
+router = APIRouter(prefix="/pricing", tags=["Pricing"])
+
+
+@router.post('/what_if', response_model=TariffWhatIfResultSchemas, status_code=status.HTTP_200_OK)
+@transaction
+async def tariff_what_if(
+        proposal: TariffWhatIfSchemas,
+        service: Annotated[PricingService, Depends(pricing_service)]
+):
+    """
+    Endpoint to evaluate a proposed tariff or exchange rate over all orders without changing them.
+
+    Args:
+        proposal (TariffWhatIfSchemas): Proposed tariff coefficients, exchange rate and distribution buckets.
+        service (PricingService): Service dependency for evaluating tariffs.
+
+    Returns:
+        TariffWhatIfResultSchemas: Revenue under the current and the proposed tariff, the delta and
+        the distribution of delivery costs.
+    """
+
+    result = await service.what_if(proposal)
+    return result
@@ -1,7 +1,15 @@
+from decimal import Decimal
+from typing import AsyncIterator
+
 from fastapi import HTTPException, status, Request
+from sqlalchemy import Row
 
+from src.cache.invalidation import invalidate_orders
 from src.database.repository import AbstractRepository
+from src.database.pagination import Page
 from src.database.models import *
+from src.models.order.schemas import ORDER_COLUMNS, OrderSortEnum
+from src.models.user_session.signing import read_session_cookie
 
 
 class OrderService:
@@ -16,26 +24,43 @@ class OrderService:
         """
         self.repo: AbstractRepository = repo()
 
-    async def create_order(self, payload: dict) -> Order:
+    async def create_order(self, payload: dict) -> str:
         """
-        Create a new order based on provided data.
+        Create a new order based on provided data with a single INSERT ... RETURNING statement.
 
         Args:
             payload (dict): A dictionary with the data needed to create an order.
 
         Returns:
-            Order: Created order object.
+            str: Identifier of the created order.
+
+        Raises:
+            HTTPException: If there is a database error (status code 500).
+        """
+
+        res = await self.repo.create_many([payload])
+        return res[0]
+
+    async def create_orders(self, payloads: list[dict]) -> list[str]:
+        """
+        Create several orders at once.
+
+        Args:
+            payloads (list[dict]): Dictionaries with the data needed to create each order.
+
+        Returns:
+            list[str]: Identifiers of the created orders, in the order of payloads.
 
         Raises:
             HTTPException: If there is a database error (status code 500).
         """
 
-        res = await self.repo.create(payload)
+        res = await self.repo.create_many(payloads)
         return res
 
     async def update_order(self, payload: dict, order_id: str) -> str:
         """
-        Update an existing order identified by order_id with new data.
+        Update an existing order identified by order_id with new data and drop its cached response.
 
         Args:
             payload (dict): A dictionary with the data needed to update an order.
@@ -48,24 +73,53 @@ class OrderService:
             HTTPException: If there is a database error (status code 500).
         """
 
-        res = await self.repo.update(payload, order_id)
+        res, task_id = await self.repo.update_returning_task_id(payload, order_id)
+        # The update is committed, so the cached responses by id and by task id can be dropped right away
+        await invalidate_orders([res, task_id])
+        return res
+
+    async def price_uncalculated(
+            self,
+            usd_to_rub_rate: Decimal,
+            limit: int
+    ) -> list[tuple[str, str | None, Decimal]]:
+        """
+        Set the delivery cost of up to limit orders that have none.
+
+        Args:
+            usd_to_rub_rate (Decimal): USD to RUB exchange rate.
+            limit (int): Maximum number of orders to update.
+
+        Returns:
+            list[tuple[str, str | None, Decimal]]: Identifiers, background task ids and delivery costs of
+            the updated orders.
+        """
+
+        res = await self.repo.price_uncalculated(usd_to_rub_rate, limit)
         return res
 
-    async def get_order(self, order_id: str) -> Order:
+    async def get_order(self, order_id: str) -> Row:
         """
-        Retrieve an order by its unique order_id.
+        Retrieve the ORDER_COLUMNS of an order by its unique order_id or by the background task id it was
+        registered with, each looked up through its own unique index.
 
         Args:
-            order_id (str): Identifier of the order to retrieve.
+            order_id (str): Identifier or background task id of the order to retrieve.
 
         Returns:
-            Order: Retrieved order object.
+            Row: Retrieved order row.
 
         Raises:
             HTTPException: If the specified order is not found (status code 404).
         """
 
-        res = await self.repo.find_one(order_id)
+        res = await self.repo.find_by_id(order_id, columns=ORDER_COLUMNS)
+        if res is None:
+            res = await self.repo.find_by_background_task_id(order_id, columns=ORDER_COLUMNS)
+
+        if res is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not found')
+
         return res
 
     async def get_orders_for_user(
@@ -74,10 +128,12 @@ class OrderService:
             order_type,
             delivery_cost,
             page,
-            page_size
-    ) -> list[Order]:
+            page_size,
+            sort_by: OrderSortEnum = OrderSortEnum.ID,
+            cursor: str | None = None
+    ) -> Page[Row]:
         """
-        Retrieve orders for a specific user based on filters like order type and delivery cost.
+        Retrieve the ORDER_COLUMNS of the orders of a user based on filters like order type and delivery cost.
 
         Args:
             request (Request): FastAPI request object containing cookies.
@@ -85,26 +141,71 @@ class OrderService:
             delivery_cost (bool | None): Optional filter for delivery cost presence.
             page (int): Page number for pagination.
             page_size (int): Number of items per page.
+            sort_by (OrderSortEnum): Sort key of the list.
+            cursor (str | None): Cursor of the next page, switches pagination from OFFSET to keyset mode.
 
         Returns:
-            list[Order]: List of orders for the user with applied filters.
+            Page[Row]: Order rows for the user with applied filters, the cursor of the next page and the number
+            of orders on all pages.
 
         Raises:
             HTTPException: If user session ID is not found (status code 404).
         """
-        cookie_id = request.cookies.get('session_id')
-
-        if cookie_id is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="You have not created any orders")
-
-        if order_type is not None:
-            order_type = order_type.value
+        cookie_id = self._session_id(request)
 
         res = await self.repo.get_orders_for_user(
             order_type=order_type,
             delivery_cost=delivery_cost,
             cookie_id=cookie_id,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            sort_by=sort_by.value,
+            cursor=cursor,
+            columns=ORDER_COLUMNS
         )
+        res.total = await self.repo.count_for_user(order_type, delivery_cost, cookie_id)
         return res
+
+    def export_orders_for_user(
+            self,
+            request: Request,
+            order_type,
+            delivery_cost,
+            chunk_size: int
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Read the ORDER_COLUMNS of all orders of a user in chunks, with the filters of get_orders_for_user.
+
+        The session is checked right away, the rows are read through a server-side cursor while the result is
+        iterated, inside a session opened by the caller.
+
+        Args:
+            request (Request): FastAPI request object containing cookies.
+            order_type (str | None): Optional filter for order type.
+            delivery_cost (bool | None): Optional filter for delivery cost presence.
+            chunk_size (int): Number of orders read at once.
+
+        Returns:
+            AsyncIterator[list[Row]]: Chunks of order rows in id order.
+
+        Raises:
+            HTTPException: If user session ID is not found (status code 401).
+        """
+        cookie_id = self._session_id(request)
+
+        return self.repo.stream_orders_for_user(
+            order_type=order_type,
+            delivery_cost=delivery_cost,
+            cookie_id=cookie_id,
+            columns=ORDER_COLUMNS,
+            chunk_size=chunk_size
+        )
+
+    @staticmethod
+    def _session_id(request: Request) -> str:
+        cookie_id = read_session_cookie(request)
+
+        if cookie_id is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="You have not created any orders")
+
+        return cookie_id
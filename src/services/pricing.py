@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+import numpy as np
+
+from src.config import settings
+from src.database.repository import AbstractRepository
+from src.models.pricing.schemas import TariffWhatIfSchemas
+from src.pricing.delivery import Tariff, calculate_delivery_costs
+from src.pricing.exchange_rate import get_price_usd
+
+
+class PricingService:
+    """Service class for evaluating tariff changes."""
+
+    def __init__(self, repo: AbstractRepository):
+        """
+        Initialize PricingService with a repository.
+
+        Args:
+            repo (AbstractRepository): Repository implementing database operations.
+        """
+        self.repo: AbstractRepository = repo()
+
+    async def what_if(self, proposal: TariffWhatIfSchemas) -> dict:
+        """
+        Compares delivery costs of all orders under the current and the proposed tariff, without changing any rows.
+
+        Orders are read in column chunks of WHAT_IF_CHUNK_SIZE rows and priced with NumPy, only running totals and
+        bucket counts are kept between chunks.
+
+        Args:
+            proposal (TariffWhatIfSchemas): Proposed tariff, exchange rate and distribution buckets.
+
+        Returns:
+            dict: Revenue under both tariffs, the delta and the distribution of delivery costs.
+        """
+
+        current_rate = float(await get_price_usd())
+        proposed_rate = float(proposal.usd_to_rub_rate) if proposal.usd_to_rub_rate is not None else current_rate
+        proposed_tariff = Tariff(weight_rate=proposal.weight_rate, cost_rate=proposal.cost_rate)
+        bounds = np.array(sorted(float(bound) for bound in proposal.buckets))
+
+        orders = 0
+        current_revenue = proposed_revenue = 0.0
+        max_increase = max_decrease = 0.0
+        current_counts = np.zeros(len(bounds) + 1, dtype=np.int64)
+        proposed_counts = np.zeros(len(bounds) + 1, dtype=np.int64)
+
+        async for chunk in self.repo.stream_weights_and_costs(settings.WHAT_IF_CHUNK_SIZE):
+            columns = np.array(chunk, dtype=np.float64)
+            weights, costs = columns[:, 0], columns[:, 1]
+
+            current = calculate_delivery_costs(weights, costs, current_rate)
+            proposed = calculate_delivery_costs(weights, costs, proposed_rate, proposed_tariff)
+            delta = proposed - current
+
+            orders += len(columns)
+            current_revenue += float(current.sum())
+            proposed_revenue += float(proposed.sum())
+            max_increase = max(max_increase, float(delta.max()))
+            max_decrease = min(max_decrease, float(delta.min()))
+            # Bucket i holds costs in (bounds[i - 1], bounds[i]], the last one everything above bounds[-1]
+            current_counts += np.bincount(np.searchsorted(bounds, current), minlength=len(bounds) + 1)
+            proposed_counts += np.bincount(np.searchsorted(bounds, proposed), minlength=len(bounds) + 1)
+
+        revenue_delta = proposed_revenue - current_revenue
+        upper_bounds = [*sorted(proposal.buckets), None]
+
+        return {
+            'orders': orders,
+            'current_usd_to_rub_rate': _money(current_rate, places=4),
+            'proposed_usd_to_rub_rate': _money(proposed_rate, places=4),
+            'current_revenue': _money(current_revenue),
+            'proposed_revenue': _money(proposed_revenue),
+            'revenue_delta': _money(revenue_delta),
+            'revenue_delta_percent': _money(revenue_delta / current_revenue * 100) if current_revenue else None,
+            'max_increase': _money(max_increase),
+            'max_decrease': _money(max_decrease),
+            'distribution': [
+                {'upper_bound': bound, 'current': int(current), 'proposed': int(proposed)}
+                for bound, current, proposed in zip(upper_bounds, current_counts, proposed_counts)
+            ],
+        }
+
+
+def _money(value: float, places: int = 2) -> Decimal:
+    return Decimal(str(round(value, places)))
@@ -27,3 +27,27 @@ class UserSessionService:
 
         res = await self.repo.create(payload)
         return res
+
+    async def ensure_exist(self, session_ids: list[str]) -> None:
+        """
+        Create the user sessions that are not stored yet, before orders referencing them are inserted.
+
+        Args:
+            session_ids (list[str]): Session identifiers of the orders.
+        """
+
+        # Sorted, so concurrent batches lock the same rows in the same order
+        await self.repo.create_missing(sorted(set(session_ids)))
+
+    async def exists(self, session_id: str) -> bool:
+        """
+        Check whether a user session is stored.
+
+        Args:
+            session_id (str): Session identifier.
+
+        Returns:
+            bool: True if the session exists.
+        """
+
+        return await self.repo.exists(session_id)
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import time
+from decimal import Decimal
+
+from loguru import logger
+from fastapi_cache.backends.redis import RedisBackend
+from redis.exceptions import LockError
+
+from src.cache.invalidation import invalidate_orders
+from src.cache.backend import init_cache
+from src.config import settings
+from src.database.transaction import transaction
+from src.models.order.repository import OrderRepository
+from src.models.order.status import order_status_store
+from src.pricing.exchange_rate import get_price_usd
+from src.redis_client import redis_client
+from src.services.order import OrderService
+
+REPRICE_LOCK = 'lock:reprice-orders'
+
+
+async def reprice_orders(chunk_size: int = settings.REPRICE_CHUNK_SIZE) -> dict:
+    """
+    Sets the delivery cost of all orders that do not have one yet.
+
+    The exchange rate is fetched once, then orders are priced chunk by chunk with set-based UPDATE statements,
+    each chunk in its own transaction. A Redis lock makes overlapping runs skip instead of racing.
+
+    To run it outside the schedule:
+    python src/worker/reprice.py
+
+    Args:
+        chunk_size (int): Maximum number of orders updated by one statement.
+
+    Returns:
+        dict: Status of the run, number of updated orders and rows per second.
+    """
+
+    lock = redis_client.lock(REPRICE_LOCK, timeout=settings.REPRICE_LOCK_TIMEOUT)
+    if not await lock.acquire(blocking=False):
+        logger.info("Repricing is already running, skipping")
+        return {'status': 'skipped'}
+
+    try:
+        usd_to_rub_rate = Decimal(str(await get_price_usd()))
+        started = time.perf_counter()
+        rows = 0
+
+        while True:
+            orders = await price_chunk(usd_to_rub_rate, chunk_size) or []
+            rows += len(orders)
+            # The chunk is committed, cached responses showing the order without a cost are dropped
+            await invalidate_orders(lookup_id for order_id, task_id, _ in orders for lookup_id in (order_id, task_id))
+            await order_status_store.stored((task_id, order_id, cost) for order_id, task_id, cost in orders)
+            if len(orders) < chunk_size:
+                break
+            # Long runs keep the lock for another REPRICE_LOCK_TIMEOUT seconds
+            await lock.reacquire()
+
+        elapsed = time.perf_counter() - started
+        rows_per_second = round(rows / elapsed) if elapsed else rows
+        logger.info(f"Repriced {rows} orders in {elapsed:.2f}s, {rows_per_second} rows/s")
+        return {'status': 'success', 'rows': rows, 'rows_per_second': rows_per_second}
+    except Exception as e:
+        logger.error(f"Error in repricing orders: {e}")
+        raise
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            logger.warning("Repricing lock expired before the run finished")
+
+
+@transaction
+async def price_chunk(usd_to_rub_rate: Decimal, chunk_size: int) -> list[tuple[str, str | None, Decimal]]:
+    service = OrderService(OrderRepository)
+    return await service.price_uncalculated(usd_to_rub_rate, chunk_size)
+
+
+if __name__ == '__main__':
+    init_cache(RedisBackend(redis_client))
+    print(asyncio.run(reprice_orders()))
@@ -1,68 +1,59 @@
-import httpx
+from decimal import Decimal
 
 from loguru import logger
-from fastapi_cache.decorator import cache
 
+from src.database.transaction import transaction
+from src.pricing.delivery import resolve_delivery_cost
 from src.services.order import OrderService
+from src.services.user_session import UserSessionService
 from src.models.order.repository import OrderRepository
+from src.models.order.status import order_status_store
+from src.models.user_session.repository import UserSessionRepository
 
 
 async def process_create_order(payload: dict) -> dict:
     """
-    Asynchronously processes the creation of an order and calculates the delivery cost.
+    Stores an order of a Celery task and records its status once it is committed.
 
     Args:
         payload (dict): Dictionary containing order details.
 
     Returns:
         dict: Dictionary indicating the success of the task.
-
-    Raises:
-        RuntimeError: If there is an error during order creation or delivery cost calculation.
-
-    Note:
-        This function creates an order using the OrderService, calculates the delivery cost based on the item's weight
-        and cost, updates the order with the calculated delivery cost, and returns a success message.
     """
 
-    try:
-        service = OrderService(OrderRepository)
-        order = await service.create_order(payload)
-        delivery_cost = await get_delivery_cost(float(payload['weight']), float(payload['cost']))
-        await service.update_order({'delivery_cost': delivery_cost}, order.id)
-        logger.info(f"Order created: task[{order.id}]")
-        return {'status': 'success'}
-    except Exception as e:
-        logger.error(f"Error in processing order creation: {e}")
-        raise
+    if stored := await store_order(payload):
+        await order_status_store.stored(stored)
+    return {'status': 'success'}
 
 
-@cache(expire=300)
-async def get_price_usd() -> float:
-    """
-    Retrieves the current USD to RUB exchange rate from an external API.
+@transaction
+async def store_order(payload: dict) -> list[tuple[str, str, Decimal | None]]:
     """
+    Asynchronously processes the creation of an order and calculates the delivery cost.
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get('https://www.cbr-xml-daily.ru/daily_json.js')
-        data = response.json()
-        usd_to_rub_rate = data['Valute']['USD']['Value']
-        return usd_to_rub_rate
-    except Exception as e:
-        logger.error(f"Error when receiving the USD exchange rate: {e}")
-        raise
+    Args:
+        payload (dict): Dictionary containing order details.
 
+    Returns:
+        list[tuple[str, str, Decimal | None]]: Background task id, identifier and delivery cost of the order.
 
-async def get_delivery_cost(weight: float, cost: float) -> str:
-    """
-    Calculates the delivery cost for an order based on its weight and cost, using the current USD to RUB exchange rate.
+    Raises:
+        RuntimeError: If there is an error during order creation or delivery cost calculation.
+
+    Note:
+        The delivery cost is calculated before the order is stored, so the order is written with a single INSERT.
+        If the exchange rate is unavailable the order is stored without the cost and priced later.
+        The user session is stored together with its first order.
     """
 
     try:
-        usd_to_rub_rate = await get_price_usd()
-        delivery_cost = str(round((weight * 0.5 + cost * 0.01) * usd_to_rub_rate, 2))
-        return delivery_cost
+        delivery_cost = await resolve_delivery_cost(payload)
+        await UserSessionService(UserSessionRepository).ensure_exist([payload['session_uuid']])
+        service = OrderService(OrderRepository)
+        order_id = await service.create_order({**payload, 'delivery_cost': delivery_cost})
+        logger.info(f"Order created: task[{order_id}]")
+        return [(payload['background_task_id'], order_id, delivery_cost)]
     except Exception as e:
-        logger.error(f"Error in calculating the shipping cost: {e}")
+        logger.error(f"Error in processing order creation: {e}")
         raise
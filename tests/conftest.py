@@ -5,8 +5,10 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 from httpx import AsyncClient
+from fastapi_cache.backends.inmemory import InMemoryBackend
 
 from src.main import app
+from src.cache.backend import init_cache
 from src.database.models import *
 from src.database.transaction import transaction
 from src.config import settings
@@ -45,6 +47,12 @@ async def prepare_database():
         await conn.run_sync(Base.metadata.create_all)
 
 
+@pytest.fixture(autouse=True, scope='session')
+def prepare_cache():
+    # The lifespan of the app is not run by the test client
+    init_cache(InMemoryBackend())
+
+
 @pytest.fixture(scope='session')
 async def ac() -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(app=app, base_url="http://test") as ac:
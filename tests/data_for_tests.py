@@ -28,7 +28,8 @@ ORDERS_TEST = [
         "weight": 10.50,
         "cost": 100.00,
         "order_type_name": "Miscellaneous",
-        "session_uuid": "token123"
+        "session_uuid": "token123",
+        "background_task_id": "5f0c7a2e-9b1d-4c3e-8a6f-2d4b1e7c9a30"
     },
     {
         "id": "21cdff51-a20d-4bb0-9ee1-34a60d4c09f5",
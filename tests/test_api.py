@@ -1,17 +1,45 @@
 import uuid
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock, MagicMock
 
 from httpx import AsyncClient
+from fastapi_cache import FastAPICache
 
-from data_for_tests import ORDER_TYPE_TEST
+from data_for_tests import ORDER_TYPE_TEST, ORDERS_TEST
+from src.database.pagination import encode_cursor
+from src.models.order.status import OrderStatusStore
+from src.models.order_types.registry import DEFAULT_ORDER_TYPES, OrderTypeEntry, OrderTypeRegistry
+from src.models.user_session.signing import sign_session_id
 
 
 @pytest.fixture
 def mock_celery_task():
-    fake_uuid = str(uuid.uuid4())
-    with patch('src.routers.order.create_order_task.delay', return_value=Mock(id=fake_uuid)):
-        yield fake_uuid
+    # The task id of a Celery result is the one the endpoint passed in
+    with patch(
+            'src.routers.order.create_order_task.apply_async',
+            side_effect=lambda args, task_id: Mock(id=task_id)
+    ) as apply_async:
+        yield apply_async
+
+
+@pytest.fixture
+def status_store():
+    values = {}
+    pipe = MagicMock()
+    pipe.set.side_effect = lambda key, value, ex: values.__setitem__(key, value)
+    pipe.execute = AsyncMock()
+    redis = MagicMock()
+    redis.pipeline.return_value.__aenter__.return_value = pipe
+    redis.get = AsyncMock(side_effect=values.get)
+    store = OrderStatusStore(redis, ttl=60)
+    with patch('src.routers.order.order_status_store', store):
+        yield store
+
+
+@pytest.fixture
+def mock_send_batch():
+    with patch('src.routers.order_create_RMQ.rabbit_connection.send_batch', new_callable=AsyncMock) as send_batch:
+        yield send_batch
 
 
 @pytest.mark.usefixtures('empty_orders')
@@ -19,9 +47,12 @@ class TestAPI:
     @pytest.mark.parametrize(
         "token, status, response_len",
         [
-            ("token123", 200, 3),
-            ("fake_token", 404, 1),
-            (None, 401, 1)
+            (sign_session_id("token123"), 200, 3),
+            (sign_session_id("fake_token"), 404, 1),
+            (None, 401, 1),
+            ("token123", 401, 1),
+            ("token123.forged", 401, 1),
+            (str(uuid.uuid4()), 401, 1),
         ]
     )
     async def test_get_user_orders_list(self, token, status, response_len, ac: AsyncClient):
@@ -32,6 +63,77 @@ class TestAPI:
         response_json = response.json()
         assert len(response_json) == response_len
 
+    async def test_get_user_orders_list_legacy_cookie_is_signed(self, ac: AsyncClient):
+        session_id = str(uuid.uuid4())
+        service = Mock()
+        service.return_value.exists = AsyncMock(return_value=True)
+
+        with patch('src.models.user_session.task.tasks_cookie.UserSessionService', service):
+            response = await ac.get('/order/get_user_orders_list', cookies={'session_id': session_id})
+
+        # The session is accepted, it just has no orders
+        assert response.status_code == 404
+        assert response.cookies['session_id'] == sign_session_id(session_id)
+        service.return_value.exists.assert_awaited_once_with(session_id)
+
+    @pytest.mark.parametrize("sort_by", ["id", "cost", "delivery_cost", "created_at"])
+    async def test_get_user_orders_list_cursor(self, sort_by, ac: AsyncClient):
+        cookies = {'session_id': sign_session_id('token123')}
+        params = {'page_size': 2, 'sort_by': sort_by}
+        first = await ac.get('/order/get_user_orders_list', params=params, cookies=cookies)
+
+        assert first.status_code == 200
+        assert len(first.json()) == 2
+        cursor = first.headers['X-Next-Cursor']
+        assert first.headers['X-Total-Count'] == '3'
+        assert first.headers['X-Has-Next'] == 'true'
+
+        second = await ac.get('/order/get_user_orders_list', params={**params, 'cursor': cursor}, cookies=cookies)
+
+        assert second.status_code == 200
+        assert len(second.json()) == 1
+        assert 'X-Next-Cursor' not in second.headers
+        assert second.headers['X-Has-Next'] == 'false'
+        ids = {order['id'] for order in first.json() + second.json()}
+        assert len(ids) == 3
+
+    @pytest.mark.parametrize("delivery_cost, status", [("false", 200), ("true", 404)])
+    async def test_get_user_orders_list_not_calculated(self, delivery_cost, status, ac: AsyncClient):
+        cookies = {'session_id': sign_session_id('token123')}
+        response = await ac.get(
+            '/order/get_user_orders_list', params={'delivery_cost': delivery_cost}, cookies=cookies
+        )
+
+        assert response.status_code == status
+        if status == 200:
+            assert all(order['delivery_cost'] == 'Не рассчитана' for order in response.json())
+
+    async def test_get_user_orders_list_invalid_cursor(self, ac: AsyncClient):
+        cookies = {'session_id': sign_session_id('token123')}
+        response = await ac.get('/order/get_user_orders_list', params={'cursor': 'broken'}, cookies=cookies)
+
+        assert response.status_code == 400
+
+    async def test_get_user_orders_list_null_cursor_for_not_null_key(self, ac: AsyncClient):
+        cookies = {'session_id': sign_session_id('token123')}
+        cursor = encode_cursor('cost', None, str(uuid.uuid4()))
+        response = await ac.get(
+            '/order/get_user_orders_list', params={'sort_by': 'cost', 'cursor': cursor}, cookies=cookies
+        )
+
+        assert response.status_code == 400
+
+    async def test_get_user_orders_list_type_from_registry(self, ac: AsyncClient):
+        cookies = {'session_id': sign_session_id('token123')}
+        registry = OrderTypeRegistry((*DEFAULT_ORDER_TYPES, OrderTypeEntry(4, 'Books')))
+
+        with patch('src.models.order_types.schemas.order_type_registry', registry):
+            books = await ac.get('/order/get_user_orders_list', params={'order_type': 'Books'}, cookies=cookies)
+            unknown = await ac.get('/order/get_user_orders_list', params={'order_type': 'Food'}, cookies=cookies)
+
+        assert books.status_code == 404
+        assert unknown.status_code == 422
+
     async def test_create_order(self, mock_celery_task, ac: AsyncClient):
         response = await ac.post('/order/create_order', json={
             'name': 'aaa',
@@ -44,6 +146,46 @@ class TestAPI:
         assert type(response.json()['id']) == str
         assert "session_id" in response.cookies
 
+    async def test_get_order_status_after_create(self, mock_celery_task, status_store, ac: AsyncClient):
+        created = await ac.post('/order/create_order', json={
+            'name': 'aaa',
+            'weight': '12',
+            'cost': '32',
+            'order_type_name': 'Clothing',
+        })
+        task_id = created.json()['id']
+
+        response = await ac.get(f'/order/status/{task_id}')
+
+        assert response.status_code == 200
+        assert response.json()['task_id'] == task_id
+        assert response.json()['status'] == 'queued'
+
+    async def test_get_order_status_unknown_task(self, status_store, ac: AsyncClient):
+        response = await ac.get(f'/order/status/{uuid.uuid4()}')
+
+        assert response.status_code == 404
+
+    async def test_create_orders_batch(self, mock_send_batch, ac: AsyncClient):
+        orders = [
+            {'name': 'aaa', 'weight': '12', 'cost': '32', 'order_type_name': 'Clothing'},
+            {'name': 'bbb', 'weight': '1.5', 'cost': '7.25', 'order_type_name': 'Electronics'},
+        ]
+        response = await ac.post('/create_order_rabbit/batch', json=orders)
+
+        assert response.status_code == 200
+        ids = [order['id'] for order in response.json()]
+        assert len(set(ids)) == 2
+        mock_send_batch.assert_awaited_once()
+        payloads = mock_send_batch.await_args.kwargs['messages']
+        assert [payload['background_task_id'] for payload in payloads] == ids
+
+    async def test_create_orders_batch_empty(self, mock_send_batch, ac: AsyncClient):
+        response = await ac.post('/create_order_rabbit/batch', json=[])
+
+        assert response.status_code == 422
+        mock_send_batch.assert_not_awaited()
+
     @pytest.mark.parametrize(
         "name,weight, cost, order_type, status, detail",
         [
@@ -67,6 +209,34 @@ class TestAPI:
         assert response.status_code == status
         assert detail in response.text
 
+    async def test_reprice_orders(self, ac: AsyncClient):
+        fake_uuid = str(uuid.uuid4())
+        with patch('src.routers.order.reprice_orders_task.delay', return_value=Mock(id=fake_uuid)) as delay:
+            response = await ac.post('/order/reprice')
+
+        assert response.status_code == 202
+        assert response.json()['id'] == fake_uuid
+        delay.assert_called_once_with()
+
+    @pytest.mark.parametrize(
+        "proposal, delta_sign",
+        [
+            ({}, 0),
+            ({'weight_rate': '0.6'}, 1),
+            ({'usd_to_rub_rate': '45'}, -1),
+        ]
+    )
+    async def test_tariff_what_if(self, proposal, delta_sign, ac: AsyncClient):
+        with patch('src.services.pricing.get_price_usd', AsyncMock(return_value=90.0)):
+            response = await ac.post('/pricing/what_if', json=proposal)
+
+        assert response.status_code == 200
+        response_json = response.json()
+        assert response_json['orders'] == 3
+        delta = float(response_json['revenue_delta'])
+        assert (delta > 0) - (delta < 0) == delta_sign
+        assert sum(bucket['proposed'] for bucket in response_json['distribution']) == 3
+
     async def test_order_type_list(self, ac: AsyncClient):
         response = await ac.get('/type/order_type_list')
 
@@ -76,6 +246,26 @@ class TestAPI:
         assert response_json[0]['name'] == "Clothing"
         assert response_json == ORDER_TYPE_TEST
 
+    async def test_get_order_by_id_second_request_is_cached(self, ac: AsyncClient):
+        await FastAPICache.clear()
+        order_id = "21cbff51-a20d-4bb0-9ee1-44a60d4c07d3"
+
+        first = await ac.get(f'/order/{order_id}', params={'id': order_id})
+        second = await ac.get(f'/order/{order_id}', params={'id': order_id})
+
+        assert first.headers['X-FastAPI-Cache'] == 'MISS'
+        assert second.headers['X-FastAPI-Cache'] == 'HIT'
+        assert second.json() == first.json()
+
+    async def test_get_order_by_background_task_id(self, ac: AsyncClient):
+        order = ORDERS_TEST[0]
+        task_id = order['background_task_id']
+
+        response = await ac.get(f'/order/{task_id}', params={'id': task_id})
+
+        assert response.status_code == 200
+        assert response.json()['name'] == order['name']
+
     @pytest.mark.parametrize(
         "id, expected_status, data",
         [
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from conftest import engine_test
+from src.models.order.repository import OrderRepository
+
+
+@pytest.mark.usefixtures('empty_orders')
+class TestOrderIndexes:
+    @pytest.mark.parametrize(
+        "sort_by, order_type, delivery_cost, index",
+        [
+            ("id", None, None, "ix_orders_session_uuid_id"),
+            ("cost", None, None, "ix_orders_session_uuid_cost_id"),
+            ("delivery_cost", None, None, "ix_orders_session_uuid_delivery_cost_id"),
+            ("created_at", None, None, "ix_orders_session_uuid_created_at_id"),
+            ("id", "Clothing", None, "ix_orders_session_uuid_order_type_name_id"),
+            ("id", None, False, "ix_orders_session_uuid_id_not_calculated"),
+            ("cost", None, True, "ix_orders_session_uuid_cost_id"),
+            ("delivery_cost", None, True, "ix_orders_session_uuid_delivery_cost_id"),
+        ]
+    )
+    async def test_get_orders_for_user_uses_index(self, sort_by, order_type, delivery_cost, index):
+        query = OrderRepository._orders_page_query(order_type, delivery_cost, "token123", sort_by, page_size=10)
+        sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+
+        async with engine_test.connect() as conn:
+            # The test table is tiny, make the planner pick an index whenever one is usable, and read the rows in
+            # order from an index whenever one provides it. A plan still sorts if no index matches the page order.
+            await conn.execute(text("SET enable_seqscan = off"))
+            await conn.execute(text("SET enable_sort = off"))
+            result = await conn.execute(text(f"EXPLAIN {sql}"))
+            plan = "\n".join(result.scalars().all())
+
+        assert f"using {index} on" in plan
+        assert "Sort" not in plan